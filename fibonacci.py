@@ -1,4 +1,8 @@
+import numpy as np
+import threading
 import time
+from collections import OrderedDict
+from functools import lru_cache
 
 
 def recursive_fibonacci(n):
@@ -16,26 +20,102 @@ def recursive_fibonacci(n):
         return recursive_fibonacci(n - 1) + recursive_fibonacci(n - 2)
 
 
-memo_f = [0, 1]
+class FibonacciMemo:
+    """
+    Bounded memory of Fibonacci numbers for memoization_fibonacci which is safe to share between threads. Rather than
+    every value, only the checkpoint pairs F(k), F(k + 1) for every k which is a multiple of checkpoint_interval are
+    kept, and F(n) is found by stepping forward from the checkpoint below n. Once max_size checkpoints are kept, the
+    least recently used one, or the oldest one, is evicted to make room for the next.
+    """
+
+    def __init__(self, max_size=1024, checkpoint_interval=16, evict_least_recently_used=True):
+        """
+        :param max_size: Maximum number of checkpoints kept
+        :param checkpoint_interval: Distance between checkpoints. At most this many steps are taken from a checkpoint
+        :param evict_least_recently_used: Whether to evict the least recently used checkpoint when full, rather than
+                                          the oldest one
+        """
+        self.max_size = max_size
+        self.checkpoint_interval = checkpoint_interval
+        self.evict_least_recently_used = evict_least_recently_used
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._checkpoints = OrderedDict()
+        self._lock = threading.Lock()
+
+    def fibonacci(self, n):
+        """
+        Calculates the nth number of the Fibonacci sequence, starting from a remembered checkpoint if there is one
+
+        :param n: The position in the Fibonacci sequence to calculate
+        :return: The value at position n in the Fibonacci sequence
+        """
+        checkpoint = n - n % self.checkpoint_interval
+        with self._lock:
+            pair = self._checkpoints.get(checkpoint)
+            if pair is not None:
+                self.hits += 1
+                if self.evict_least_recently_used:
+                    self._checkpoints.move_to_end(checkpoint)
+            else:
+                self.misses += 1
+
+        # The numbers are found outside the lock, so threads only wait on each other for the bookkeeping
+        if pair is None:
+            pair = _fibonacci_pair(checkpoint)
+            with self._lock:
+                if checkpoint not in self._checkpoints:
+                    self._checkpoints[checkpoint] = pair
+                    if len(self._checkpoints) > self.max_size:
+                        self._checkpoints.popitem(last=False)
+                        self.evictions += 1
+
+        previous, current = pair
+        for _ in range(n - checkpoint):
+            previous, current = current, previous + current
+
+        return previous
+
+    def stats(self):
+        """
+        Gives the counters of how well the memory has been used
+
+        :return: Dictionary of the number of 'hits', 'misses' and 'evictions', and the number of checkpoints kept as
+                 'size'
+        """
+        with self._lock:
+            return {'hits': self.hits, 'misses': self.misses, 'evictions': self.evictions,
+                    'size': len(self._checkpoints)}
+
+    def clear(self):
+        """
+        Forgets every checkpoint, releasing their memory, and resets the counters
+        """
+        with self._lock:
+            self._checkpoints.clear()
+            self.hits = 0
+            self.misses = 0
+            self.evictions = 0
 
 
-def memoization_fibonacci(n):
+# Used by memoization_fibonacci when it is not given a memory of its own
+global_fibonacci_memo = FibonacciMemo()
+
+
+def memoization_fibonacci(n, memo=None):
     """
-    Calculates the nth number of the Fibonacci sequence recursively, making use of Memoization to remember previously
-    calculated values
+    Calculates the nth number of the Fibonacci sequence, making use of Memoization to remember previously calculated
+    values. The values are remembered in a bounded FibonacciMemo, which may be shared by many threads.
 
     :param n: The position in the Fibonacci sequence to calculate
+    :param memo: The FibonacciMemo to use, if not given the one shared by the whole module is used
     :return: The value at position n in the Fibonacci sequence
     """
-    if n == 0:
-        return 0
-    elif n == 1:
-        return 1
-    else:
-        if len(memo_f) <= n:
-            for i in range(max(len(memo_f), 2), n + 1):
-                memo_f.append(memoization_fibonacci(i - 1) + memoization_fibonacci(i - 2))
-        return memo_f[n]
+    if memo is None:
+        memo = global_fibonacci_memo
+
+    return memo.fibonacci(n)
 
 
 def iterative_fibonacci(n):
@@ -45,26 +125,266 @@ def iterative_fibonacci(n):
     :param n: The position in the Fibonacci sequence to calculate
     :return: The value at position n in the Fibonacci sequence
     """
-    f = [0, 1]
-    for i in range(2, n + 1):
-        f.append(f[i - 1] + f[i - 2])
+    # Only the last two values are needed for the next one
+    previous, current = 0, 1
+    for _ in range(n):
+        previous, current = current, previous + current
+
+    return previous
+
+
+def fast_doubling_fibonacci(n, mod=None):
+    """
+    Calculates the nth number of the Fibonacci sequence in O(log n) arithmetic operations using the identities
+    F(2k) = F(k)(2F(k + 1) - F(k)) and F(2k + 1) = F(k)^2 + F(k + 1)^2, working through the bits of n from the most
+    significant
+
+    :param n: The position in the Fibonacci sequence to calculate
+    :param mod: If given, the value is calculated modulo this number, which keeps the intermediate values small
+    :return: The value at position n in the Fibonacci sequence, modulo mod if it is given
+    """
+    return _fibonacci_pair(n, mod)[0]
+
+
+def matrix_fibonacci(n, mod=None):
+    """
+    Calculates the nth number of the Fibonacci sequence by raising the matrix [[1, 1], [1, 0]] to the power n with
+    repeated squaring, as its top right entry is then F(n)
+
+    :param n: The position in the Fibonacci sequence to calculate
+    :param mod: If given, the value is calculated modulo this number, which keeps the intermediate values small
+    :return: The value at position n in the Fibonacci sequence, modulo mod if it is given
+    """
+    result = (1, 0, 0, 1)
+    power = (1, 1, 1, 0)
+    while n > 0:
+        if n & 1:
+            result = _multiply_matrices(result, power, mod)
+        power = _multiply_matrices(power, power, mod)
+        n >>= 1
+
+    return result[1] % mod if mod is not None else result[1]
+
+
+# Largest modulus whose Pisano period fib and batch_fibonacci will find when asked to reduce positions by it
+PISANO_PERIOD_LIMIT = 10 ** 6
+
+# Number of Pisano periods kept by pisano_period between calls
+PISANO_CACHE_SIZE = 128
+
+
+@lru_cache(maxsize=PISANO_CACHE_SIZE)
+def pisano_period(m):
+    """
+    Finds the Pisano period of m, the length of the cycle which the Fibonacci sequence modulo m repeats in. The
+    period is at most 6m, so it is found by stepping through the sequence until it returns to 0, 1. The last
+    PISANO_CACHE_SIZE periods found are remembered for later calls.
+
+    :param m: The modulus, at least 1
+    :return: The Pisano period of m
+    """
+    previous, current = 0, 1 % m
+    period = 0
+    while True:
+        previous, current = current, (previous + current) % m
+        period += 1
+        if previous == 0 and current == 1 % m:
+            break
+
+    return period
+
+
+def fib(n, mod=None, reduce_period=False):
+    """
+    Calculates the nth number of the Fibonacci sequence, optionally modulo a number. This is the fastest of the
+    functions in this module for large n.
+
+    With a modulus, fast doubling only takes O(log n) operations, which is far less than the O(m) steps of finding
+    the Pisano period of the modulus. So n is only reduced modulo the period when reduce_period is set, which pays off
+    when many positions are calculated with the same modulus and its period is remembered between them.
+
+    :param n: The position in the Fibonacci sequence to calculate
+    :param mod: If given, the value is calculated modulo this number
+    :param reduce_period: Whether to first reduce n modulo the Pisano period of mod, as the sequence modulo mod
+                          repeats with that period. Moduli larger than PISANO_PERIOD_LIMIT are never reduced, as their
+                          periods would take too long to find
+    :return: The value at position n in the Fibonacci sequence, modulo mod if it is given
+    """
+    if reduce_period and mod is not None and mod <= PISANO_PERIOD_LIMIT:
+        n %= pisano_period(mod)
+
+    return fast_doubling_fibonacci(n, mod)
+
+
+def batch_fibonacci(ns, mod=None, reduce_period=False):
+    """
+    Calculates many numbers of the Fibonacci sequence at once, which is much faster than calling the other functions
+    in this module once for each. Each distinct position is only calculated once.
+
+    Without a modulus, if every position is small enough for its value to fit in 64 bits the values are looked up in
+    a precalculated table. Otherwise the values are found in one sweep up to the largest position, stopping at each
+    position wanted.
+
+    With a modulus below 2^32 the values are found by fast doubling on every position at once in NumPy, as the
+    products of two values then fit in 64 bits. Larger moduli fall back to calling fib for each distinct position.
+
+    :param ns: NumPy array or iterable of positions in the Fibonacci sequence to calculate
+    :param mod: If given, the values are calculated modulo this number
+    :param reduce_period: Whether to first reduce the positions modulo the Pisano period of mod, as fib does. This
+                          shortens the fast doubling of each position, which only pays off for large batches
+    :return: A tuple consisting of the following:
+                - NumPy array of the value at each position, modulo mod if it is given. Its dtype is uint64, or object
+                  if the values may not fit in 64 bits. None if an error occurs
+                - an error message, None if one does not occur
+    """
+    ns = np.asarray(ns if isinstance(ns, np.ndarray) else list(ns), dtype=np.int64)
+    if ns.size == 0:
+        return np.empty(ns.shape, dtype=np.uint64), None
+    unique_ns, inverse = np.unique(ns, return_inverse=True)
+    inverse = inverse.reshape(ns.shape)
+    # A negative position would otherwise index the table of values from its end
+    if unique_ns[0] < 0:
+        return None, 'Positions must not be negative'
+
+    if mod is None:
+        if unique_ns[-1] < len(_UINT64_FIBONACCI):
+            return _UINT64_FIBONACCI[ns], None
+        values = np.empty(len(unique_ns), dtype=object)
+        previous, current = 0, 1
+        position = 0
+        for i, n in enumerate(unique_ns.tolist()):
+            for _ in range(n - position):
+                previous, current = current, previous + current
+            position = n
+            values[i] = previous
+        return values[inverse], None
+
+    if mod <= 2 ** 32:
+        if reduce_period and mod <= PISANO_PERIOD_LIMIT:
+            unique_ns = unique_ns % pisano_period(mod)
+        return _vectorized_fibonacci_pairs(unique_ns, mod)[0][inverse], None
+
+    values = np.array([fib(n, mod) for n in unique_ns.tolist()], dtype=np.uint64 if mod <= 2 ** 64 else object)
+    return values[inverse], None
+
+
+def _fibonacci_pair(n, mod=None):
+    """
+    Calculates F(n) and F(n + 1) by fast doubling
+
+    :param n: The position in the Fibonacci sequence to calculate
+    :param mod: If given, the values are calculated modulo this number
+    :return: A tuple of the values at positions n and n + 1 in the Fibonacci sequence, modulo mod if it is given
+    """
+    # a and b hold F(k) and F(k + 1) for k the bits of n seen so far
+    a, b = 0, 1
+    for bit in bin(n)[2:]:
+        c = a * (2 * b - a)
+        d = a * a + b * b
+        if mod is not None:
+            c %= mod
+            d %= mod
+        if bit == '1':
+            a, b = d, c + d
+            if mod is not None:
+                b %= mod
+        else:
+            a, b = c, d
+
+    if mod is not None:
+        return a % mod, b % mod
+    return a, b
+
+
+def _vectorized_fibonacci_pairs(ns, mod):
+    """
+    Calculates F(n) and F(n + 1) modulo a number for every position in an array by fast doubling, working through the
+    bits of every position at once
+
+    :param ns: NumPy array of positions in the Fibonacci sequence to calculate
+    :param mod: The modulus, at most 2^32 so that products of two values fit in 64 bits
+    :return: A tuple of NumPy uint64 arrays of the values at positions n and n + 1 in the Fibonacci sequence modulo mod
+    """
+    ns = ns.astype(np.uint64)
+    m = np.uint64(mod)
+    a = np.zeros(len(ns), dtype=np.uint64)
+    b = np.full(len(ns), 1 % mod, dtype=np.uint64)
+    bit_count = int(ns.max()).bit_length() if len(ns) > 0 else 0
+    for shift in range(bit_count - 1, -1, -1):
+        c = a * ((2 * b + m - a) % m) % m
+        d = (a * a % m + b * b % m) % m
+        is_set = ((ns >> np.uint64(shift)) & np.uint64(1)).astype(bool)
+        a = np.where(is_set, d, c)
+        b = np.where(is_set, (c + d) % m, d)
+
+    return a, b
+
+
+def _uint64_fibonacci_table():
+    """
+    Calculates every number of the Fibonacci sequence which fits in 64 bits, stopping at the first which overflows
+
+    :return: NumPy uint64 array where position n is the value at position n in the Fibonacci sequence
+    """
+    values = [0]
+    previous, current = 0, 1
+    while current < 2 ** 64:
+        values.append(current)
+        previous, current = current, previous + current
+
+    return np.array(values, dtype=np.uint64)
+
+
+def _multiply_matrices(a, b, mod):
+    """
+    Multiplies two 2x2 matrices, each stored as a tuple of its entries in row order
+
+    :param a: The left matrix
+    :param b: The right matrix
+    :param mod: If given, the entries of the product are taken modulo this number
+    :return: The product of the matrices
+    """
+    product = (a[0] * b[0] + a[1] * b[2], a[0] * b[1] + a[1] * b[3],
+               a[2] * b[0] + a[3] * b[2], a[2] * b[1] + a[3] * b[3])
+    if mod is not None:
+        product = tuple(entry % mod for entry in product)
+
+    return product
+
+
+# Every value up to F(93), which is the last to fit in 64 bits
+_UINT64_FIBONACCI = _uint64_fibonacci_table()
+
 
-    return f[n]
+# The examples print timings, so they only run when this module is executed directly rather than imported
+if __name__ == '__main__':
+    print(recursive_fibonacci(5))
 
+    s = time.time()
+    print(memoization_fibonacci(5))
+    e = time.time()
+    print('Memoization 5 first run:', e - s)
 
-print(recursive_fibonacci(5))
+    s = time.time()
+    print(memoization_fibonacci(5))
+    e = time.time()
+    print('Memoization 5 second run:', e - s)
 
-s = time.time()
-print(memoization_fibonacci(5))
-e = time.time()
-print('Memoization 5 first run:', e - s)
+    print(memoization_fibonacci(10))
+    print(global_fibonacci_memo.stats())
 
-s = time.time()
-print(memoization_fibonacci(5))
-e = time.time()
-print('Memoization 5 second run:', e - s)
+    print(iterative_fibonacci(5))
+    print(iterative_fibonacci(10))
 
-print(memoization_fibonacci(10))
+    print(fast_doubling_fibonacci(10))
+    print(matrix_fibonacci(10))
+    print(fib(10 ** 18, mod=1000))
+    values, _ = batch_fibonacci([10, 5, 10, 93])
+    print(values)
+    values, _ = batch_fibonacci([10 ** 18, 10], mod=1000)
+    print(values)
 
-print(iterative_fibonacci(5))
-print(iterative_fibonacci(10))
+    s = time.time()
+    fib(10 ** 6)
+    e = time.time()
+    print('Fast doubling 10^6:', e - s)
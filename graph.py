@@ -0,0 +1,645 @@
+import numpy as np
+import bisect
+import os
+import tempfile
+from itertools import islice
+
+# Layout of the header at the start of a graph file, which is followed by the indptr, indices and weights arrays and
+# then the vertex label table. The table holds the labels and the vertex IDs in order of their labels, so a label can be
+# found with a binary search. Every array before the bytes of string labels has 8 byte items, so each stays aligned
+_HEADER_DTYPE = np.dtype([
+    ('magic', 'S8'),
+    ('version', '<u4'),
+    ('label_kind', '<u4'),
+    ('weight_kind', '<u4'),
+    ('padding', '<u4'),
+    ('vertex_count', '<u8'),
+    ('edge_count', '<u8'),
+    ('label_byte_count', '<u8')
+])
+_HEADER_SIZE = 64
+_GRAPH_FILE_MAGIC = b'CSRGRAPH'
+_GRAPH_FILE_VERSION = 2
+_INTEGER_LABELS, _STRING_LABELS = 0, 1
+_WEIGHT_DTYPES = [np.dtype('<i8'), np.dtype('<f8')]
+
+
+class Graph:
+    """
+    Compact weighted graph shared by the algorithms in shortest_path and minimum_spanning_tree. Vertex labels are
+    interned to integer IDs, and the edges out of each vertex are held as a compressed sparse row (CSR) adjacency in
+    NumPy arrays. The undirected view used by the Minimum Spanning Tree algorithms is built on first use and kept, so a
+    graph only has to be converted once however many algorithms are run on it. Graphs saved with save_graph can be
+    opened with open_graph, which memory-maps the arrays rather than reading them. Searches on a memory-mapped graph
+    read its edges and labels from the file as they go, rather than building private copies.
+    """
+
+    def __init__(self, vertices, indptr, indices, weights):
+        """
+        :param vertices: List of vertex labels, where a vertex's position is its integer ID
+        :param indptr: Array where the edges out of vertex i are at positions indptr[i] to indptr[i + 1]
+        :param indices: Array of the destination vertex ID of each edge
+        :param weights: Array of the weight of each edge
+        """
+        self.vertices = vertices
+        self.indptr = indptr
+        self.indices = indices
+        self.weights = weights
+        self._vertex_ids = None
+        self._adjacency_lists = None
+        self._undirected_edges = None
+        self._undirected_csr = None
+
+    @classmethod
+    def from_dict(cls, graph):
+        """
+        Converts a dictionary representing a graph. Vertices which are keys of the dictionary are numbered first, in
+        order, followed by vertices which are only the destination of an edge, in the order they are first seen.
+
+        :param graph: Dictionary representing the graph. Each vertex is a key and its value is a list of tuples
+                      representing each edge from that vertex. E.g. {'u': [('v', 3), ('x', 1)]} means that vertex u has
+                      an edge of length 3 to vertex v, and also an edge of length 1 to vertex x.
+        :return: The converted Graph
+        """
+        vertices = list(graph.keys())
+        vertex_ids = {vertex: i for i, vertex in enumerate(vertices)}
+        indptr = np.zeros(len(vertices) + 1, dtype=np.int64)
+        indices = []
+        weights = []
+        for i, vertex_edges in enumerate(graph.values()):
+            for dest_vertex, weight in vertex_edges:
+                if dest_vertex not in vertex_ids:
+                    vertex_ids[dest_vertex] = len(vertices)
+                    vertices.append(dest_vertex)
+                indices.append(vertex_ids[dest_vertex])
+                weights.append(weight)
+            indptr[i + 1] = len(indices)
+
+        # Vertices which are only destinations have no edges out of them
+        indptr = np.concatenate((indptr, np.full(len(vertices) + 1 - len(indptr), len(indices), dtype=np.int64)))
+        new_graph = cls(vertices, indptr, np.array(indices, dtype=np.int64), np.array(weights))
+        new_graph._vertex_ids = vertex_ids
+
+        return new_graph
+
+    def to_dict(self):
+        """
+        Converts the graph back into a dictionary, with every vertex as a key including those with no edges out of them
+
+        :return: Dictionary representing the graph, in the same format taken by from_dict
+        """
+        indptr, indices, weights = self.adjacency_lists()
+
+        return {vertex: [(self.vertices[indices[edge]], weights[edge]) for edge in range(indptr[i], indptr[i + 1])]
+                for i, vertex in enumerate(self.vertices)}
+
+    @property
+    def vertex_count(self):
+        return len(self.indptr) - 1
+
+    @property
+    def vertex_ids(self):
+        """
+        Dictionary mapping each vertex label to its integer ID, built on first use. For a memory-mapped graph, the
+        label table in the file is searched instead, so no dictionary of every label is built
+        """
+        if self._vertex_ids is None:
+            if isinstance(self.vertices, _LabelTable):
+                self._vertex_ids = _LabelIds(self.vertices)
+            else:
+                self._vertex_ids = {vertex: i for i, vertex in enumerate(self.vertices)}
+        return self._vertex_ids
+
+    def out_edges(self, vertex):
+        """
+        Gives the edges out of one vertex. A memory-mapped graph is read from the file a vertex at a time, so processes
+        searching the same file share its pages rather than each converting all of it with adjacency_lists.
+
+        :param vertex: Integer ID of the vertex
+        :return: A tuple of a list of the destination vertex ID of each edge and a list of the weight of each edge
+        """
+        if self._adjacency_lists is None and isinstance(self.vertices, _LabelTable):
+            start, end = self.indptr[vertex:vertex + 2].tolist()
+            return self.indices[start:end].tolist(), self.weights[start:end].tolist()
+
+        indptr, indices, weights = self.adjacency_lists()
+        return indices[indptr[vertex]:indptr[vertex + 1]], weights[indptr[vertex]:indptr[vertex + 1]]
+
+    def adjacency_lists(self):
+        """
+        Gives the CSR adjacency as Python lists, which are much faster than NumPy arrays to index one element at a time.
+        The lists are built on first use and kept, so a graph walked a vertex at a time by many searches is only
+        converted once.
+
+        :return: A tuple of the indptr, indices and weights arrays as lists
+        """
+        if self._adjacency_lists is None:
+            self._adjacency_lists = (np.asarray(self.indptr).tolist(), np.asarray(self.indices).tolist(),
+                                     np.asarray(self.weights).tolist())
+        return self._adjacency_lists
+
+    def edge_arrays(self):
+        """
+        Gives the directed edges as parallel arrays
+
+        :return: A tuple of an array of the source vertex ID of each edge, an array of the destination vertex ID of each
+                 edge and an array of the weight of each edge
+        """
+        sources = np.repeat(np.arange(self.vertex_count, dtype=np.int64), np.diff(self.indptr))
+
+        return sources, self.indices, self.weights
+
+    def undirected_edge_arrays(self):
+        """
+        Gives each undirected edge once, in the order the edges are first seen. Edges between the same two vertices with
+        the same weight are counted as convert_graph_to_edges counts them: every edge in the direction of the first one
+        seen is kept, and every edge in the other direction is taken to be its reverse. So parallel edges listed from
+        both of their vertices are kept as separate edges. The edges are grouped with a single NumPy sort.
+
+        :return: A tuple of an array of the ID of the first vertex of each edge, an array of the ID of the second vertex
+                 of each edge and an array of the weight of each edge
+        """
+        if self._undirected_edges is None:
+            sources, destinations, weights = self.edge_arrays()
+            destinations = np.asarray(destinations)
+            weights = np.asarray(weights)
+            # Each pair of vertices is numbered as one integer, which fits in 64 bits for up to 3 billion vertices
+            vertex_pairs = np.minimum(sources, destinations) * self.vertex_count + np.maximum(sources, destinations)
+            forwards = sources <= destinations
+
+            # The sort is stable, so the first edge of each group of equal keys is the first one seen
+            order = np.lexsort((weights, vertex_pairs))
+            sorted_pairs = vertex_pairs[order]
+            sorted_weights = weights[order]
+            is_group_start = np.ones(len(order), dtype=bool)
+            is_group_start[1:] = (sorted_pairs[1:] != sorted_pairs[:-1]) | (sorted_weights[1:] != sorted_weights[:-1])
+            group_starts = order[is_group_start][np.cumsum(is_group_start) - 1]
+
+            # A loop is its own reverse, so only the first of each group of loops is kept
+            is_loop = sources[order] == destinations[order]
+            kept = np.where(is_loop, is_group_start, forwards[order] == forwards[group_starts])
+            kept = np.sort(order[kept])
+            self._undirected_edges = (sources[kept], destinations[kept], weights[kept])
+
+        return self._undirected_edges
+
+    def undirected_csr(self):
+        """
+        Gives a CSR adjacency listing each undirected edge in both directions
+
+        :return: A tuple consisting of the following:
+                    - an array where the edges out of vertex i are at positions indptr[i] to indptr[i + 1]
+                    - an array of the destination vertex ID of each edge
+                    - an array of the weight of each edge
+                    - an array of the undirected edge each entry belongs to, shared by both of its directions
+        """
+        if self._undirected_csr is None:
+            first_vertices, second_vertices, weights = self.undirected_edge_arrays()
+            sources = np.concatenate((first_vertices, second_vertices))
+            destinations = np.concatenate((second_vertices, first_vertices))
+            weights = np.concatenate((weights, weights))
+            edge_ids = np.tile(np.arange(len(first_vertices), dtype=np.int64), 2)
+
+            order = np.argsort(sources, kind='stable')
+            indptr = np.zeros(self.vertex_count + 1, dtype=np.int64)
+            np.cumsum(np.bincount(sources, minlength=self.vertex_count), out=indptr[1:])
+            self._undirected_csr = (indptr, destinations[order], weights[order], edge_ids[order])
+
+        return self._undirected_csr
+
+    def adjacency_matrix(self):
+        """
+        Gives the undirected graph as an adjacency matrix. If two vertices are joined by more than one edge, the
+        lightest is kept.
+
+        :return: Square NumPy array where position [u, v] is the weight of the edge between u and v, or np.inf if there
+                 is no such edge
+        """
+        first_vertices, second_vertices, weights = self.undirected_edge_arrays()
+        adjacency_matrix = np.full((self.vertex_count, self.vertex_count), np.inf)
+        np.minimum.at(adjacency_matrix, (first_vertices, second_vertices), weights)
+        np.minimum.at(adjacency_matrix, (second_vertices, first_vertices), weights)
+
+        return adjacency_matrix
+
+
+def as_graph(graph):
+    """
+    Converts a dictionary representing a graph into a Graph, leaving a Graph as it is
+
+    :param graph: Graph, or dictionary representing the graph in the format taken by Graph.from_dict
+    :return: The Graph
+    """
+    return graph if isinstance(graph, Graph) else Graph.from_dict(graph)
+
+
+def convert_graph_to_edges(graph):
+    """
+    Converts a dictionary representing a graph into a list of tuples representing edges. An edge is left out if its
+    reverse, with the same weight, has already been listed.
+
+    :param graph: Dictionary representing the graph. Each vertex is a key and its value is a list of tuples representing
+                  each edge from that vertex. E.g. {'u': [('v', 3), ('x', 1)]} means that vertex u has an edge of length
+                  3 to vertex v, and also an edge of length 1 to vertex x.
+    :return: A list of tuples where each tuple is an edge e.g. ('u', 'v', 3) represents the edge between u and v with
+             weight 3
+    """
+    edges = []
+    listed_edges = set()
+    for vertex, vertex_edges in graph.items():
+        for dest_vertex, weight in vertex_edges:
+            if (dest_vertex, vertex, weight) not in listed_edges:
+                listed_edges.add((vertex, dest_vertex, weight))
+                edges.append((vertex, dest_vertex, weight))
+
+    return edges
+
+
+def convert_edges_to_graph(edges):
+    """
+    Converts a list of tuples representing undirected edges into a dictionary representing the whole graph
+
+    :param edges: A list of tuples where each tuple is an edge e.g. ('u', 'v', 3) represents the edge between u and v
+                  with weight 3
+    :return: Dictionary representing the graph. Each vertex is a key and its value is a list of tuples representing
+             each edge from that vertex. E.g. {'u': [('v', 3), ('x', 1)]} means that vertex u has an edge of length
+             3 to vertex v, and also an edge of length 1 to vertex x.
+    """
+    graph = {}
+    for first_vertex, second_vertex, weight in edges:
+        graph.setdefault(first_vertex, []).append((second_vertex, weight))
+        graph.setdefault(second_vertex, []).append((first_vertex, weight))
+
+    return graph
+
+
+def save_graph(graph, path):
+    """
+    Writes a graph to a binary file which open_graph can memory-map. The file holds a header, the CSR indptr, indices
+    and weights arrays, and a table of the vertex labels.
+
+    :param graph: Graph, or dictionary representing the graph in the format taken by Graph.from_dict. Its vertex labels
+                  must either all be integers or all be strings
+    :param path: Path of the file to write
+    :return: A tuple consisting of the following:
+                - the Graph read back from the file by open_graph. None if an error occurs
+                - an error message, None if one does not occur
+    """
+    graph = as_graph(graph)
+    label_kind, label_arrays = _encode_labels(graph.vertices)
+    if label_kind is None:
+        return None, 'Vertex labels must all be integers or all be strings'
+
+    weights = np.asarray(graph.weights)
+    weight_kind = 0 if np.issubdtype(weights.dtype, np.integer) else 1
+    with open(path, 'wb') as graph_file:
+        _write_header(graph_file, label_kind, weight_kind, graph.vertex_count, len(weights),
+                      sum(array.nbytes for array in label_arrays))
+        for array in [np.asarray(graph.indptr, dtype='<i8'), np.asarray(graph.indices, dtype='<i8'),
+                      weights.astype(_WEIGHT_DTYPES[weight_kind])] + label_arrays:
+            array.tofile(graph_file)
+
+    return open_graph(path)
+
+
+def open_graph(path):
+    """
+    Opens a graph file written by save_graph or convert_edge_list_file. The arrays are memory-mapped rather than read,
+    so opening takes the same short time for any size of graph, and processes which open the same file share its pages
+    in memory. The graph is read-only.
+
+    :param path: Path of the graph file
+    :return: A tuple consisting of the following:
+                - the Graph, whose arrays are backed by the file. None if an error occurs
+                - an error message, None if one does not occur
+    """
+    header = np.fromfile(path, dtype=_HEADER_DTYPE, count=1)
+    if len(header) == 0 or header['magic'][0] != _GRAPH_FILE_MAGIC or header['version'][0] != _GRAPH_FILE_VERSION:
+        return None, 'Not a graph file'
+
+    vertex_count = header['vertex_count'][0].item()
+    edge_count = header['edge_count'][0].item()
+    offset = _HEADER_SIZE
+    indptr = _map_array(path, '<i8', offset, vertex_count + 1)
+    offset += indptr.nbytes
+    indices = _map_array(path, '<i8', offset, edge_count)
+    offset += indices.nbytes
+    weights = _map_array(path, _WEIGHT_DTYPES[header['weight_kind'][0]], offset, edge_count)
+    offset += weights.nbytes
+
+    if header['label_kind'][0] == _INTEGER_LABELS:
+        labels = _map_array(path, '<i8', offset, vertex_count)
+        label_offsets = None
+        offset += labels.nbytes
+    else:
+        label_offsets = _map_array(path, '<i8', offset, vertex_count + 1)
+        offset += label_offsets.nbytes
+    label_order = _map_array(path, '<i8', offset, vertex_count)
+    if label_offsets is not None:
+        labels = _map_array(path, np.uint8, offset + label_order.nbytes, label_offsets[-1].item())
+    vertices = _LabelTable(labels, label_order, label_offsets)
+
+    return Graph(vertices, indptr, indices, weights), None
+
+
+def convert_edge_list_file(edge_list_path, path, directed=True, integer_labels=False, weight_dtype=np.float64,
+                           chunk_size=1 << 20, temp_dir=None):
+    """
+    Converts a text file with one edge per line, given as its two vertices and an optional weight (1 if left out)
+    separated by whitespace, into a graph file. The file is read in chunks of lines, so only the vertex labels and
+    one chunk of edges are held in memory at once. Blank lines and lines starting with # are skipped.
+
+    The edges are first written to temporary files in the order they are read, then placed into the CSR arrays of the
+    graph file with a counting sort by source vertex, keeping the edges out of each vertex in the order they were read.
+
+    :param edge_list_path: Path of the edge list text file
+    :param path: Path of the graph file to write
+    :param directed: Whether each line is an edge in one direction only. If False, it is stored in both directions as
+                     the Minimum Spanning Tree algorithms expect
+    :param integer_labels: Whether the vertex labels are integers, rather than strings
+    :param weight_dtype: NumPy dtype to parse the weights as, either np.int64 or np.float64
+    :param chunk_size: Number of lines read at a time
+    :param temp_dir: Directory to write the temporary files to, if not given the system's default is used
+    :return: A tuple consisting of the following:
+                - the Graph read back from the file by open_graph. None if an error occurs
+                - an error message, None if one does not occur
+    """
+    weight_kind = 0 if np.issubdtype(np.dtype(weight_dtype), np.integer) else 1
+    parse_weight = int if weight_kind == 0 else float
+    parse_label = int if integer_labels else str
+    vertex_ids = {}
+    out_degrees = np.zeros(0, dtype=np.int64)
+    edge_count = 0
+
+    with tempfile.TemporaryDirectory(dir=temp_dir) as directory, open(edge_list_path) as edge_list_file:
+        edge_paths = [os.path.join(directory, name) for name in ('sources', 'destinations', 'weights')]
+        with open(edge_paths[0], 'wb') as sources_file, open(edge_paths[1], 'wb') as destinations_file, \
+                open(edge_paths[2], 'wb') as weights_file:
+            while True:
+                lines = list(islice(edge_list_file, chunk_size))
+                if not lines:
+                    break
+
+                sources = []
+                destinations = []
+                weights = []
+                for line in lines:
+                    fields = line.split()
+                    if not fields or fields[0].startswith('#'):
+                        continue
+                    if len(fields) not in (2, 3):
+                        return None, 'Invalid edge on line: ' + line.strip()
+                    try:
+                        first_vertex, second_vertex = parse_label(fields[0]), parse_label(fields[1])
+                        weight = parse_weight(fields[2]) if len(fields) == 3 else 1
+                    except ValueError:
+                        return None, 'Invalid edge on line: ' + line.strip()
+
+                    first_id = vertex_ids.setdefault(first_vertex, len(vertex_ids))
+                    second_id = vertex_ids.setdefault(second_vertex, len(vertex_ids))
+                    sources.append(first_id)
+                    destinations.append(second_id)
+                    weights.append(weight)
+                    if not directed:
+                        sources.append(second_id)
+                        destinations.append(first_id)
+                        weights.append(weight)
+
+                sources = np.array(sources, dtype='<i8')
+                sources.tofile(sources_file)
+                np.array(destinations, dtype='<i8').tofile(destinations_file)
+                np.array(weights, dtype=_WEIGHT_DTYPES[weight_kind]).tofile(weights_file)
+                chunk_degrees = np.bincount(sources, minlength=len(vertex_ids))
+                chunk_degrees[:len(out_degrees)] += out_degrees
+                out_degrees = chunk_degrees
+                edge_count += len(sources)
+
+        vertex_count = len(vertex_ids)
+        out_degrees = np.concatenate((out_degrees, np.zeros(vertex_count - len(out_degrees), dtype=np.int64)))
+        indptr = np.zeros(vertex_count + 1, dtype='<i8')
+        np.cumsum(out_degrees, out=indptr[1:])
+        label_kind, label_arrays = _encode_labels(list(vertex_ids.keys()))
+        del vertex_ids
+
+        # The edges are left as a gap between indptr and the label table, to be filled in by _fill_edges
+        with open(path, 'wb') as graph_file:
+            _write_header(graph_file, label_kind, weight_kind, vertex_count, edge_count,
+                          sum(array.nbytes for array in label_arrays))
+            indptr.tofile(graph_file)
+            graph_file.seek(edge_count * (8 + _WEIGHT_DTYPES[weight_kind].itemsize), os.SEEK_CUR)
+            for array in label_arrays:
+                array.tofile(graph_file)
+        _fill_edges(path, indptr, edge_paths, edge_count, weight_kind, chunk_size)
+
+    return open_graph(path)
+
+
+class _LabelTable:
+    """
+    Read-only list of vertex labels backed by memory-mapped arrays, decoding each label when it is accessed
+    """
+
+    def __init__(self, labels, label_order, label_offsets=None):
+        """
+        :param labels: Array of integer labels, or of the UTF-8 bytes of every string label back to back
+        :param label_order: Array of the vertex IDs in increasing order of their labels, comparing string labels by
+                            their UTF-8 bytes
+        :param label_offsets: Array where string label i is at positions label_offsets[i] to label_offsets[i + 1] of
+                              labels. None if the labels are integers
+        """
+        self._labels = labels
+        self._label_order = label_order
+        self._label_offsets = label_offsets
+
+    def __len__(self):
+        return len(self._labels) if self._label_offsets is None else len(self._label_offsets) - 1
+
+    def __getitem__(self, i):
+        if self._label_offsets is None:
+            return self._labels[i].item()
+        return bytes(self._labels[self._label_offsets[i]:self._label_offsets[i + 1]]).decode('utf-8')
+
+    def __iter__(self):
+        if self._label_offsets is None:
+            return iter(self._labels.tolist())
+
+        # Reading the table in one go is much faster than decoding each label through the memory map
+        labels = bytes(self._labels)
+        label_offsets = self._label_offsets.tolist()
+        return (labels[label_offsets[i]:label_offsets[i + 1]].decode('utf-8') for i in range(len(label_offsets) - 1))
+
+    def find(self, label):
+        """
+        Finds the vertex ID of a label with a binary search, reading only the labels it compares against
+
+        :param label: The vertex label to find
+        :return: The vertex ID, or None if no vertex has the label
+        """
+        if self._label_offsets is None:
+            if not isinstance(label, (int, np.integer)) or isinstance(label, bool):
+                return None
+            key = self._labels.__getitem__
+        else:
+            if not isinstance(label, str):
+                return None
+            label = label.encode('utf-8')
+            key = self._label_bytes
+
+        position = bisect.bisect_left(self._label_order, label, key=key)
+        if position < len(self._label_order) and key(self._label_order[position]) == label:
+            return self._label_order[position].item()
+        return None
+
+    def _label_bytes(self, i):
+        return bytes(self._labels[self._label_offsets[i]:self._label_offsets[i + 1]])
+
+
+class _LabelIds:
+    """
+    Read-only mapping from each vertex label to its integer ID, backed by the label table of a memory-mapped graph
+    """
+
+    def __init__(self, label_table):
+        """
+        :param label_table: _LabelTable of the graph's vertex labels
+        """
+        self._label_table = label_table
+
+    def __getitem__(self, label):
+        vertex = self._label_table.find(label)
+        if vertex is None:
+            raise KeyError(label)
+        return vertex
+
+    def __contains__(self, label):
+        return self._label_table.find(label) is not None
+
+    def get(self, label, default=None):
+        vertex = self._label_table.find(label)
+        return default if vertex is None else vertex
+
+
+def _encode_labels(vertices):
+    """
+    Encodes the vertex labels of a graph as the arrays of a graph file's label table
+
+    :param vertices: List of vertex labels, where a vertex's position is its integer ID
+    :return: A tuple of _INTEGER_LABELS or _STRING_LABELS and the list of arrays making up the table, or (None, None) if
+             the labels are not all integers or all strings
+    """
+    vertices = list(vertices)
+    if all(isinstance(vertex, (int, np.integer)) and not isinstance(vertex, bool) for vertex in vertices):
+        labels = np.array(vertices, dtype='<i8')
+        return _INTEGER_LABELS, [labels, np.argsort(labels, kind='stable').astype('<i8')]
+    elif all(isinstance(vertex, str) for vertex in vertices):
+        encoded_labels = [vertex.encode('utf-8') for vertex in vertices]
+        label_offsets = np.zeros(len(vertices) + 1, dtype='<i8')
+        np.cumsum([len(label) for label in encoded_labels], out=label_offsets[1:])
+        label_order = np.array(sorted(range(len(vertices)), key=encoded_labels.__getitem__), dtype='<i8')
+        return _STRING_LABELS, [label_offsets, label_order, np.frombuffer(b''.join(encoded_labels), dtype=np.uint8)]
+    else:
+        return None, None
+
+
+def _write_header(graph_file, label_kind, weight_kind, vertex_count, edge_count, label_byte_count):
+    """
+    Writes the header of a graph file, padded to _HEADER_SIZE bytes
+
+    :param graph_file: File opened for writing in binary mode, at its start
+    :param label_kind: _INTEGER_LABELS or _STRING_LABELS
+    :param weight_kind: Position of the weights' dtype in _WEIGHT_DTYPES
+    :param vertex_count: Number of vertices
+    :param edge_count: Number of directed edges
+    :param label_byte_count: Size of the vertex label table in bytes
+    """
+    header = np.zeros(1, dtype=_HEADER_DTYPE)
+    header[0] = (_GRAPH_FILE_MAGIC, _GRAPH_FILE_VERSION, label_kind, weight_kind, 0, vertex_count, edge_count,
+                 label_byte_count)
+    graph_file.write(header.tobytes().ljust(_HEADER_SIZE, b'\0'))
+
+
+def _map_array(path, dtype, offset, count):
+    """
+    Memory-maps an array stored in a file for reading
+
+    :param path: Path of the file
+    :param dtype: NumPy dtype of the array
+    :param offset: Position of the start of the array in the file, in bytes
+    :param count: Number of items in the array
+    :return: The memory-mapped array, or an empty array if count is 0 as an empty memory map cannot be made
+    """
+    if count == 0:
+        return np.zeros(0, dtype=dtype)
+    # A plain ndarray view of the map is several times faster to slice than the memmap subclass, and keeps it open
+    return np.memmap(path, dtype=dtype, mode='r', offset=offset, shape=(count,)).view(np.ndarray)
+
+
+def _fill_edges(path, indptr, edge_paths, edge_count, weight_kind, chunk_size):
+    """
+    Places the edges from the temporary files written by convert_edge_list_file into the gap left for them in a graph
+    file
+
+    :param path: Path of the graph file
+    :param indptr: Array where the edges out of vertex i are to be placed at positions indptr[i] to indptr[i + 1]
+    :param edge_paths: List of the paths of the temporary files of sources, destinations and weights, in reading order
+    :param edge_count: Number of edges in the temporary files
+    :param weight_kind: Position of the weights' dtype in _WEIGHT_DTYPES
+    :param chunk_size: Number of edges placed at a time
+    """
+    if edge_count == 0:
+        return
+
+    weight_dtype = _WEIGHT_DTYPES[weight_kind]
+    offset = _HEADER_SIZE + indptr.nbytes
+    indices = np.memmap(path, dtype='<i8', mode='r+', offset=offset, shape=(edge_count,))
+    weights = np.memmap(path, dtype=weight_dtype, mode='r+', offset=offset + indices.nbytes, shape=(edge_count,))
+    all_sources, all_destinations, all_weights = (np.memmap(edge_path, dtype=dtype, mode='r', shape=(edge_count,))
+                                                  for edge_path, dtype in zip(edge_paths, ['<i8', '<i8', weight_dtype]))
+
+    next_positions = np.array(indptr[:-1])
+    for start in range(0, edge_count, chunk_size):
+        sources = np.array(all_sources[start:start + chunk_size])
+        order = np.argsort(sources, kind='stable')
+        sorted_sources = sources[order]
+        # Position of each edge among the edges of this chunk with the same source, in reading order
+        group_starts = np.flatnonzero(np.r_[True, sorted_sources[1:] != sorted_sources[:-1]])
+        ranks = np.arange(len(order)) - np.repeat(group_starts, np.diff(np.r_[group_starts, len(order)]))
+
+        positions = next_positions[sorted_sources] + ranks
+        indices[positions] = all_destinations[start:start + chunk_size][order]
+        weights[positions] = all_weights[start:start + chunk_size][order]
+        next_positions += np.bincount(sources, minlength=len(next_positions))
+
+    indices.flush()
+    weights.flush()
+
+
+# Other modules import this one, so the examples only run when it is executed directly
+if __name__ == '__main__':
+    graph = Graph.from_dict({
+        'u': [('v', 3), ('x', 1)],
+        'v': [('u', 3)],
+        'x': [('u', 1), ('y', 2)]
+    })
+    # Expected: ['u', 'v', 'x', 'y']
+    print(graph.vertices)
+    # Expected: [0, 2, 3, 5, 5] [1, 2, 0, 0, 3]
+    print(graph.indptr.tolist(), graph.indices.tolist())
+    # Expected: [0, 0, 2] [1, 2, 3] [3, 1, 2]
+    print(*(array.tolist() for array in graph.undirected_edge_arrays()))
+    # Expected: {'u': [('v', 3), ('x', 1)], 'v': [('u', 3)], 'x': [('u', 1), ('y', 2)], 'y': []}
+    print(graph.to_dict())
+
+    with tempfile.TemporaryDirectory() as directory:
+        graph_path = os.path.join(directory, 'graph.bin')
+        mapped_graph, _ = save_graph(graph, graph_path)
+        # Expected: {'u': [('v', 3), ('x', 1)], 'v': [('u', 3)], 'x': [('u', 1), ('y', 2)], 'y': []}
+        print(mapped_graph.to_dict())
+
+        edge_list_path = os.path.join(directory, 'edges.txt')
+        with open(edge_list_path, 'w') as edge_list_file:
+            edge_list_file.write('# first second weight\nu v 3\nu x 1\nx y 2\n')
+        mapped_graph, _ = convert_edge_list_file(edge_list_path, graph_path, directed=False, weight_dtype=np.int64)
+        # Expected: {'u': [('v', 3), ('x', 1)], 'v': [('u', 3)], 'x': [('u', 1), ('y', 2)], 'y': [('x', 2)]}
+        print(mapped_graph.to_dict())
+        del mapped_graph
@@ -1,3 +1,6 @@
+import numpy as np
+import heapq
+import time
 
 
 def interval_scheduling(requests):
@@ -27,7 +30,198 @@ def interval_scheduling(requests):
     return selected_requests
 
 
-requests = [(0, 6), (7, 8), (0, 1), (2, 3), (4, 5), (6, 9), (0, 2), (3, 4), (6, 7)]
-selected_requests = interval_scheduling(requests)
-# Expected: [(0, 1), (2, 3), (4, 5), (6, 7)]
-print(selected_requests)
+def greedy_interval_scheduling(requests, presorted=False):
+    """
+    Performs the greedy algorithm for the Interval Scheduling problem in a single pass, after sorting the requests once
+    by end time. Requests may come from any iterable, such as a generator. As in interval_scheduling, a request clashes
+    with one which ends at the time it starts.
+
+    :param requests: Iterable of tuples representing requests, where the first element is the start time and the second
+                     is the end time e.g. (0, 6) starts at time 0 and finishes at time 6
+    :param presorted: Whether the requests are already in increasing order of end time. If so, they are not sorted, so
+                      the requests are processed in O(n) time with O(1) extra memory
+    :return: Generator of the optimum requests, such that the number of requests is maximised without clashing
+    """
+    if not presorted:
+        requests = sorted(requests, key=lambda x: x[1])
+
+    selected_request_end = None
+    for request in requests:
+        if selected_request_end is None or request[0] > selected_request_end:
+            selected_request_end = request[1]
+            yield request
+
+
+def weighted_interval_scheduling(requests):
+    """
+    Solves the Weighted Interval Scheduling problem with dynamic programming. Requests are sorted by end time, and the
+    last request which finishes before each one starts is found with a binary search.
+
+    :param requests: List of tuples representing requests, where the first element is the start time, the second is the
+                     end time, and the third is the weight e.g. (0, 6, 2) starts at time 0, finishes at time 6 and has
+                     weight 2
+    :return: A tuple of the maximum total weight of requests without clashing, and the list of requests which make it up
+    """
+    requests = sorted(requests, key=lambda x: x[1])
+    starts = np.array([request[0] for request in requests])
+    ends = np.array([request[1] for request in requests])
+    # Position i is the number of requests which end strictly before request i starts
+    compatible_counts = np.searchsorted(ends, starts, side='left').tolist()
+
+    # Position i is the maximum weight using only the first i requests
+    max_weights = [0] * (len(requests) + 1)
+    for i, request in enumerate(requests):
+        max_weights[i + 1] = max(max_weights[i], request[2] + max_weights[compatible_counts[i]])
+
+    selected_requests = []
+    i = len(requests)
+    while i > 0:
+        if max_weights[i] == max_weights[i - 1]:
+            i -= 1
+        else:
+            selected_requests.append(requests[i - 1])
+            i = compatible_counts[i - 1]
+    selected_requests.reverse()
+
+    return max_weights[len(requests)], selected_requests
+
+
+def interval_partitioning(starts, ends):
+    """
+    Solves the Interval Partitioning problem, assigning every request to a resource so that the fewest resources are
+    used and no two requests on the same resource clash. Requests are taken in order of start time and given any
+    resource which is free, using a ResourceAllocator.
+
+    :param starts: NumPy array of the start time of each request
+    :param ends: NumPy array of the end time of each request
+    :return: NumPy array of the resource (numbered from 0) assigned to each request, in the same order as the requests.
+             The number of resources used is one more than its maximum
+    """
+    starts = np.asarray(starts)
+    ends = np.asarray(ends)
+    order = np.argsort(starts, kind='stable')
+
+    allocator = ResourceAllocator()
+    resources = np.empty(len(starts), dtype=np.int64)
+    for request, start, end in zip(order.tolist(), starts[order].tolist(), ends[order].tolist()):
+        resources[request] = allocator.allocate(start, end)
+
+    return resources
+
+
+class ResourceAllocator:
+    """
+    Assigns requests arriving one at a time to resources, so that no two requests on the same resource clash and no
+    more resources are used than the greatest number of requests running at once. Requests must arrive in increasing
+    order of start time. Each allocation costs O(log k) time for k resources.
+    """
+
+    def __init__(self):
+        self.resource_count = 0
+        self._busy = []  # heap of (end time, resource) for each resource in use
+        self._free = []  # heap of resources not in use
+
+    def free_resource(self, start):
+        """
+        Finds which resource a request starting at a given time would be assigned, without assigning it
+
+        :param start: The start time of the request
+        :return: The resource, or None if every resource is in use and a new one would be needed
+        """
+        self._release(start)
+        return self._free[0] if self._free else None
+
+    def allocate(self, start, end):
+        """
+        Assigns a request to a free resource, using a new one if every resource is in use. The lowest numbered free
+        resource is used.
+
+        :param start: The start time of the request
+        :param end: The end time of the request
+        :return: The resource the request is assigned to
+        """
+        self._release(start)
+        if self._free:
+            resource = heapq.heappop(self._free)
+        else:
+            resource = self.resource_count
+            self.resource_count += 1
+
+        heapq.heappush(self._busy, (end, resource))
+        return resource
+
+    def _release(self, start):
+        """
+        Frees every resource whose request ends before a given time. As in interval_scheduling, a request clashes with
+        one which ends at the time it starts.
+
+        :param start: The time to free resources up to
+        """
+        while self._busy and self._busy[0][0] < start:
+            heapq.heappush(self._free, heapq.heappop(self._busy)[1])
+
+
+def _random_bookings(request_count, mean_gap=1.0, mean_duration=20.0):
+    """
+    Generates a random stream of bookings, with exponentially distributed gaps between arrivals and durations
+
+    :param request_count: Number of bookings to generate
+    :param mean_gap: Mean time between one booking starting and the next
+    :param mean_duration: Mean length of a booking
+    :return: A tuple of NumPy arrays of the start and end times of each booking, in increasing order of start time
+    """
+    starts = np.cumsum(np.random.exponential(mean_gap, request_count))
+    ends = starts + np.random.exponential(mean_duration, request_count)
+
+    return starts, ends
+
+
+def _benchmark_resource_allocator(request_count):
+    """
+    Replays a random stream of bookings through a ResourceAllocator, printing the latency percentiles of each
+    allocation and the time taken by interval_partitioning on the same bookings
+
+    :param request_count: Number of bookings to replay
+    """
+    starts, ends = _random_bookings(request_count)
+
+    allocator = ResourceAllocator()
+    latencies = np.empty(request_count)
+    for i, (start, end) in enumerate(zip(starts.tolist(), ends.tolist())):
+        s = time.perf_counter()
+        allocator.allocate(start, end)
+        latencies[i] = time.perf_counter() - s
+
+    p50, p95, p99 = np.percentile(latencies, [50, 95, 99]) * 1e6
+    print('Resources:', allocator.resource_count, 'p50:', p50, 'us, p95:', p95, 'us, p99:', p99, 'us')
+
+    s = time.time()
+    interval_partitioning(starts, ends)
+    print('interval_partitioning:', time.time() - s, 'seconds')
+
+
+# The benchmark takes a while, so the examples only run when this module is executed directly
+if __name__ == '__main__':
+    requests = [(0, 6), (7, 8), (0, 1), (2, 3), (4, 5), (6, 9), (0, 2), (3, 4), (6, 7)]
+    selected_requests = interval_scheduling(requests)
+    # Expected: [(0, 1), (2, 3), (4, 5), (6, 7)]
+    print(selected_requests)
+
+    selected_requests = list(greedy_interval_scheduling(iter(requests)))
+    # Expected: [(0, 1), (2, 3), (4, 5), (6, 7)]
+    print(selected_requests)
+
+    selected_requests = list(greedy_interval_scheduling(sorted(requests, key=lambda x: x[1]), presorted=True))
+    # Expected: [(0, 1), (2, 3), (4, 5), (6, 7)]
+    print(selected_requests)
+
+    weighted_requests = [(0, 6, 5), (7, 8, 1), (0, 1, 1), (2, 3, 1), (4, 5, 1), (6, 9, 3)]
+    max_weight, selected_requests = weighted_interval_scheduling(weighted_requests)
+    # Expected: 6 [(0, 6, 5), (7, 8, 1)]
+    print(max_weight, selected_requests)
+
+    resources = interval_partitioning(np.array([0, 1, 2, 3, 5, 6]), np.array([4, 2, 5, 4, 7, 8]))
+    # Expected: [0 1 2 1 0 1]
+    print(resources)
+
+    _benchmark_resource_allocator(100000)
@@ -1,3 +1,4 @@
+import math
 
 
 def maximum_independent_set(tree):
@@ -25,16 +26,461 @@ def maximum_independent_set(tree):
     return max_ind_set
 
 
-tree = {
-    'a': ['b', 'e'],
-    'b': ['c'],
-    'c': [],
-    'e': ['f', 'd'],
-    'f': [],
-    'd': ['g'],
-    'g': []
-}
+def tree_maximum_independent_set(tree, weights=None):
+    """
+    Given a Tree, computes the Maximum Independent Set at each node in O(n) time without recursion. Nodes are visited
+    with an explicit stack, then processed in reverse so every node comes after all of its descendants. Each node
+    passes the best weights of its subtree with and without itself up to its parent, using a flat array of parents.
+
+    :param tree: Dictionary representing the tree. Each node is a key and the value is a list of its children.
+                 E.g. {'u': ['v', 'x']} means that node u has two children: v and x. A forest of several trees is also
+                 accepted
+    :param weights: Optional dictionary of the weight of each node. Nodes not in it have weight 1
+    :return: A tuple consisting of the following:
+                - a dictionary with nodes as keys and the weight of the Maximum Independent Set of their subtree as the
+                  value
+                - the set of nodes in the Maximum Independent Set of the whole tree
+    """
+    nodes = list(tree.keys())
+    node_ids = {node: i for i, node in enumerate(nodes)}
+    for node in nodes:
+        for child in tree.get(node, []):
+            if child not in node_ids:
+                node_ids[child] = len(nodes)
+                nodes.append(child)
+    parents = [-1] * len(nodes)
+    for node, children in tree.items():
+        for child in children:
+            parents[node_ids[child]] = node_ids[node]
+
+    # Pre-order, so every node appears before its descendants
+    order = []
+    stack = [i for i in range(len(nodes)) if parents[i] == -1]
+    while stack:
+        node = stack.pop()
+        order.append(node)
+        stack += [node_ids[child] for child in tree.get(nodes[node], [])]
+
+    if weights is None:
+        weights = {}
+    # The best weight of each subtree when its root is included, and when it is excluded
+    included = [weights.get(node, 1) for node in nodes]
+    excluded = [0] * len(nodes)
+    for node in reversed(order):
+        parent = parents[node]
+        if parent != -1:
+            included[parent] += excluded[node]
+            excluded[parent] += max(included[node], excluded[node])
+
+    max_ind_set = {nodes[node]: max(included[node], excluded[node]) for node in range(len(nodes))}
+
+    chosen = [False] * len(nodes)
+    for node in order:
+        parent = parents[node]
+        chosen[node] = (parent == -1 or not chosen[parent]) and included[node] >= excluded[node]
+
+    return max_ind_set, {nodes[node] for node in range(len(nodes)) if chosen[node]}
+
+
+class IncrementalIndependentSet:
+    """
+    Maintains the Maximum Independent Set of a weighted tree as nodes are added, removed, moved and re-weighted.
+
+    The tree is held in a link-cut tree. Each node stores the best weights of its subtree with and without itself,
+    counting only its light children (those not on the same preferred path). Along a preferred path these combine as
+    products of 2x2 matrices in the (max, +) semiring, which each splay tree keeps aggregated. An edit then only needs
+    the path from the edited node to the root to be accessed, costing O(log n) amortised time.
+    """
+
+    def __init__(self, tree, weights=None):
+        """
+        :param tree: Dictionary representing the tree. Each node is a key and the value is a list of its children.
+                     E.g. {'u': ['v', 'x']} means that node u has two children: v and x. A forest of several trees is
+                     also accepted
+        :param weights: Optional dictionary of the weight of each node. Nodes not in it have weight 1
+        """
+        if weights is None:
+            weights = {}
+
+        self._node_ids = {}
+        self._nodes = []
+        self._free_ids = []
+        self._tree_parents = []
+        self._children = []
+        self._roots = set()  # IDs of the nodes with no parent, so the whole tree's weight is found without a scan
+        self._weights = []
+        self._left = []
+        self._right = []
+        self._parents = []
+        self._light_excluded = []  # best weight of the light children's subtrees, with this node excluded
+        self._light_included = []  # this node's weight, plus the best weight of its light children excluding them
+        self._products = []
+
+        for node, children in tree.items():
+            for new_node in [node] + children:
+                if new_node not in self._node_ids:
+                    self._new_id(new_node, weights.get(new_node, 1))
+        for node, children in tree.items():
+            for child in children:
+                self._set_tree_parent(self._node_ids[child], self._node_ids[node])
+
+        self._rebuild()
+
+    def value(self, node=None):
+        """
+        Finds the weight of the Maximum Independent Set of a node's subtree
+
+        :param node: The node to find the weight for. If not given, the weight for the whole tree is found
+        :return: The weight of the Maximum Independent Set
+        """
+        if node is None:
+            return sum(self.value(self._nodes[root]) for root in self._roots)
+
+        node_id = self._node_ids[node]
+        self._access(node_id)
+        return max(self._light_excluded[node_id], self._light_included[node_id])
+
+    def add_node(self, node, parent=None, weight=1):
+        """
+        Adds a new leaf to the tree
+
+        :param node: The node to add
+        :param parent: The node to add it beneath. If not given, the node becomes the root of a new tree
+        :param weight: The weight of the node
+        """
+        node_id = self._new_id(node, weight)
+        if parent is not None:
+            self._link(node_id, self._node_ids[parent])
+
+    def remove_node(self, node):
+        """
+        Removes a node, and every node beneath it, from the tree
+
+        :param node: The node to remove
+        """
+        node_id = self._node_ids[node]
+        self._cut(node_id)
+
+        stack = [node_id]
+        while stack:
+            removed_id = stack.pop()
+            stack += self._children[removed_id]
+            del self._node_ids[self._nodes[removed_id]]
+            self._nodes[removed_id] = None
+            self._roots.discard(removed_id)
+            self._free_ids.append(removed_id)
+
+    def move_node(self, node, new_parent):
+        """
+        Moves a node, along with every node beneath it, to be a child of another node
+
+        :param node: The node to move
+        :param new_parent: The node to move it beneath, which must not be beneath the moved node
+        """
+        node_id = self._node_ids[node]
+        self._cut(node_id)
+        self._link(node_id, self._node_ids[new_parent])
+
+    def set_weight(self, node, weight):
+        """
+        Changes the weight of a node
+
+        :param node: The node to change
+        :param weight: The new weight of the node
+        """
+        node_id = self._node_ids[node]
+        self._access(node_id)
+        self._light_included[node_id] += weight - self._weights[node_id]
+        self._weights[node_id] = weight
+        self._update(node_id)
+
+    def apply_edits(self, edits):
+        """
+        Applies many edits at once. If there are more than about n / log n of them, the tree is changed directly and
+        every node's weights are then found again in a single O(n) pass, rather than updating the paths to the root
+        after each edit.
+
+        :param edits: List of tuples, each one of the following:
+                        - ('add', node, parent, weight)
+                        - ('remove', node)
+                        - ('move', node, new_parent)
+                        - ('weight', node, weight)
+        """
+        if len(edits) * math.log2(max(len(self._node_ids), 2)) <= len(self._node_ids):
+            for edit in edits:
+                if edit[0] == 'add':
+                    self.add_node(*edit[1:])
+                elif edit[0] == 'remove':
+                    self.remove_node(edit[1])
+                elif edit[0] == 'move':
+                    self.move_node(*edit[1:])
+                else:
+                    self.set_weight(*edit[1:])
+            return
+
+        for edit in edits:
+            if edit[0] == 'add':
+                node_id = self._new_id(edit[1], edit[3])
+                if edit[2] is not None:
+                    self._set_tree_parent(node_id, self._node_ids[edit[2]])
+            elif edit[0] == 'remove':
+                node_id = self._node_ids[edit[1]]
+                self._set_tree_parent(node_id, -1)
+                stack = [node_id]
+                while stack:
+                    removed_id = stack.pop()
+                    stack += self._children[removed_id]
+                    del self._node_ids[self._nodes[removed_id]]
+                    self._nodes[removed_id] = None
+                    self._roots.discard(removed_id)
+                    self._free_ids.append(removed_id)
+            elif edit[0] == 'move':
+                self._set_tree_parent(self._node_ids[edit[1]], self._node_ids[edit[2]])
+            else:
+                self._weights[self._node_ids[edit[1]]] = edit[2]
+
+        self._rebuild()
+
+    def _new_id(self, node, weight):
+        """
+        Stores a new node with no parent or children, reusing the ID of a removed node if there is one
+
+        :param node: The node to store
+        :param weight: The weight of the node
+        :return: The ID of the node
+        """
+        if self._free_ids:
+            node_id = self._free_ids.pop()
+        else:
+            node_id = len(self._nodes)
+            for values in (self._nodes, self._tree_parents, self._children, self._weights, self._left, self._right,
+                           self._parents, self._light_excluded, self._light_included, self._products):
+                values.append(None)
+
+        self._node_ids[node] = node_id
+        self._nodes[node_id] = node
+        self._tree_parents[node_id] = -1
+        self._roots.add(node_id)
+        self._children[node_id] = set()
+        self._weights[node_id] = weight
+        self._left[node_id] = self._right[node_id] = self._parents[node_id] = -1
+        self._light_excluded[node_id] = 0
+        self._light_included[node_id] = weight
+        self._update(node_id)
+
+        return node_id
+
+    def _set_tree_parent(self, node_id, parent_id):
+        """
+        Changes the parent of a node in the plain tree, without updating the link-cut tree
+
+        :param node_id: ID of the node
+        :param parent_id: ID of the new parent, or -1 to make the node a root
+        """
+        if self._tree_parents[node_id] != -1:
+            self._children[self._tree_parents[node_id]].discard(node_id)
+        self._tree_parents[node_id] = parent_id
+        if parent_id != -1:
+            self._children[parent_id].add(node_id)
+            self._roots.discard(node_id)
+        else:
+            self._roots.add(node_id)
+
+    def _rebuild(self):
+        """
+        Finds the weights of every node from scratch, leaving every child light so that each node is its own path
+        """
+        order = []
+        stack = list(self._roots)
+        while stack:
+            node_id = stack.pop()
+            order.append(node_id)
+            stack += self._children[node_id]
+
+        for node_id in order:
+            self._left[node_id] = self._right[node_id] = -1
+            self._parents[node_id] = self._tree_parents[node_id]
+            self._light_excluded[node_id] = 0
+            self._light_included[node_id] = self._weights[node_id]
+
+        for node_id in reversed(order):
+            self._update(node_id)
+            parent_id = self._tree_parents[node_id]
+            if parent_id != -1:
+                self._light_excluded[parent_id] += max(self._light_excluded[node_id], self._light_included[node_id])
+                self._light_included[parent_id] += self._light_excluded[node_id]
+
+    def _link(self, node_id, parent_id):
+        """
+        Attaches the root of a tree beneath a node as a light child
+
+        :param node_id: ID of the root to attach
+        :param parent_id: ID of the node to attach it beneath
+        """
+        self._access(node_id)
+        self._access(parent_id)
+        self._light_excluded[parent_id] += max(self._light_excluded[node_id], self._light_included[node_id])
+        self._light_included[parent_id] += self._light_excluded[node_id]
+        self._update(parent_id)
+        self._parents[node_id] = parent_id
+        self._set_tree_parent(node_id, parent_id)
+
+    def _cut(self, node_id):
+        """
+        Detaches a node, and every node beneath it, from its parent
+
+        :param node_id: ID of the node to detach
+        """
+        self._access(node_id)
+        # After access, the node's ancestors are exactly its left splay subtree, and it is not counted in their weights
+        left = self._left[node_id]
+        if left != -1:
+            self._parents[left] = -1
+            self._left[node_id] = -1
+            self._update(node_id)
+        self._set_tree_parent(node_id, -1)
+
+    def _access(self, node_id):
+        """
+        Makes the path from the root to a node preferred, with the node at the bottom of the path and at the root of its
+        splay tree. Each time a child stops or starts being preferred, its path's weights are added to or taken from
+        the light weights of its parent.
+
+        :param node_id: ID of the node
+        """
+        last = -1
+        current = node_id
+        while current != -1:
+            self._splay(current)
+            if self._right[current] != -1:
+                self._add_light(current, self._right[current], 1)
+            if last != -1:
+                self._add_light(current, last, -1)
+            self._right[current] = last
+            self._update(current)
+            last = current
+            current = self._parents[current]
+
+        self._splay(node_id)
+
+    def _add_light(self, node_id, path_id, sign):
+        """
+        Adds or takes away the weights of the top of a path from the light weights of a node
+
+        :param node_id: ID of the node
+        :param path_id: ID of the root of the splay tree of the path
+        :param sign: 1 to add the weights, -1 to take them away
+        """
+        product = self._products[path_id]
+        excluded, included = product[0], product[2]
+        self._light_excluded[node_id] += sign * max(excluded, included)
+        self._light_included[node_id] += sign * excluded
+
+    def _update(self, node_id):
+        """
+        Recalculates the product of the matrices of a node's splay subtree, in path order
+
+        :param node_id: ID of the node
+        """
+        excluded = self._light_excluded[node_id]
+        product = (excluded, excluded, self._light_included[node_id], -math.inf)
+        if self._left[node_id] != -1:
+            product = _max_plus_product(self._products[self._left[node_id]], product)
+        if self._right[node_id] != -1:
+            product = _max_plus_product(product, self._products[self._right[node_id]])
+        self._products[node_id] = product
+
+    def _is_splay_root(self, node_id):
+        parent_id = self._parents[node_id]
+        return parent_id == -1 or (self._left[parent_id] != node_id and self._right[parent_id] != node_id)
+
+    def _rotate(self, node_id):
+        parent_id = self._parents[node_id]
+        grandparent_id = self._parents[parent_id]
+        if not self._is_splay_root(parent_id):
+            if self._left[grandparent_id] == parent_id:
+                self._left[grandparent_id] = node_id
+            else:
+                self._right[grandparent_id] = node_id
+        self._parents[node_id] = grandparent_id
+
+        if self._left[parent_id] == node_id:
+            child_id = self._right[node_id]
+            self._left[parent_id] = child_id
+            self._right[node_id] = parent_id
+        else:
+            child_id = self._left[node_id]
+            self._right[parent_id] = child_id
+            self._left[node_id] = parent_id
+        if child_id != -1:
+            self._parents[child_id] = parent_id
+        self._parents[parent_id] = node_id
+
+        self._update(parent_id)
+        self._update(node_id)
+
+    def _splay(self, node_id):
+        while not self._is_splay_root(node_id):
+            parent_id = self._parents[node_id]
+            if not self._is_splay_root(parent_id):
+                grandparent_id = self._parents[parent_id]
+                if (self._left[grandparent_id] == parent_id) == (self._left[parent_id] == node_id):
+                    self._rotate(parent_id)
+                else:
+                    self._rotate(node_id)
+            self._rotate(node_id)
+
+
+def _max_plus_product(first, second):
+    """
+    Multiplies two 2x2 matrices in the (max, +) semiring
+
+    :param first: Tuple of the first matrix's entries, row by row
+    :param second: Tuple of the second matrix's entries, row by row
+    :return: Tuple of the product's entries, row by row
+    """
+    return (max(first[0] + second[0], first[1] + second[2]), max(first[0] + second[1], first[1] + second[3]),
+            max(first[2] + second[0], first[3] + second[2]), max(first[2] + second[1], first[3] + second[3]))
+
+
+# The examples build large trees, so they only run when this module is executed directly
+if __name__ == '__main__':
+    tree = {
+        'a': ['b', 'e'],
+        'b': ['c'],
+        'c': [],
+        'e': ['f', 'd'],
+        'f': [],
+        'd': ['g'],
+        'g': []
+    }
+
+    max_ind_set = maximum_independent_set(tree)
+    # Expected: {'a': 4, 'b': 1, 'c': 1, 'e': 2, 'f': 1, 'd': 1, 'g': 1}
+    print(max_ind_set)
+
+    max_ind_set, chosen_nodes = tree_maximum_independent_set(tree)
+    # Expected (set in any order): {'a': 4, 'b': 1, 'c': 1, 'e': 2, 'f': 1, 'd': 1, 'g': 1} {'a', 'c', 'f', 'd'}
+    print(max_ind_set, chosen_nodes)
+
+    max_ind_set, chosen_nodes = tree_maximum_independent_set(tree, weights={'e': 5})
+    # Expected (set in any order): 7 {'b', 'e', 'g'}
+    print(max_ind_set.get('a'), chosen_nodes)
+
+    path = {i: [i + 1] for i in range(10 ** 5)}
+    max_ind_set, chosen_nodes = tree_maximum_independent_set(path)
+    # Expected: 50001
+    print(max_ind_set.get(0))
+
+    incremental = IncrementalIndependentSet(tree)
+    # Expected: 4
+    print(incremental.value())
+
+    incremental.set_weight('e', 5)
+    incremental.add_node('h', 'c', 3)
+    # Expected: 10
+    print(incremental.value())
 
-max_ind_set = maximum_independent_set(tree)
-# Expected: {'a': 4, 'b': 1, 'c': 1, 'e': 2, 'f': 1, 'd': 1, 'g': 1}
-print(max_ind_set)
+    incremental.apply_edits([('remove', 'b'), ('move', 'g', 'a')])
+    # Expected: 6
+    print(incremental.value())
@@ -1,3 +1,15 @@
+import numpy as np
+import heapq
+import random
+import time
+
+from graph import Graph, as_graph, convert_edges_to_graph, convert_graph_to_edges
+
+# Edge density (E / V^2) above which adaptive_prim switches from eager_prim to dense_prim. Found using _benchmark_prim,
+# where dense_prim was 5 to 40% faster than eager_prim at densities of 0.2 and above for 200 to 2000 vertices, and
+# slower at 0.03 and below
+DENSE_PRIM_THRESHOLD = 0.15
+
 
 def prim(graph):
     """
@@ -30,6 +42,151 @@ def prim(graph):
     return edges
 
 
+def lazy_prim(graph):
+    """
+    Performs Prim's algorithm using a binary heap of edges, running in O(E log E) time. Edges which lead to an explored
+    vertex are left in the heap and skipped when popped.
+
+    :param graph: Graph, or dictionary representing the graph. Each vertex is a key and its value is a list of tuples
+                  representing each edge from that vertex. E.g. {'u': [('v', 3), ('x', 1)]} means that vertex u has an
+                  edge of length 3 to vertex v, and also an edge of length 1 to vertex x.
+    :return: A list of tuples where each tuple is an edge in the MST e.g. ('u', 'v', 3) represents the edge between u
+             and v with weight 3. Only the tree containing the first vertex is returned if the graph is disconnected
+    """
+    graph = as_graph(graph)
+    vertices = graph.vertices
+    indptr, indices, weights, _ = graph.undirected_csr()
+    if len(vertices) == 0:
+        return []
+    indptr = indptr.tolist()
+    indices = indices.tolist()
+    weights = weights.tolist()
+
+    explored = [False] * len(vertices)
+    explored[0] = True
+    heap = [(weights[edge], 0, indices[edge]) for edge in range(indptr[0], indptr[1])]
+    heapq.heapify(heap)
+
+    edges = []
+    while heap and len(edges) < len(vertices) - 1:
+        weight, vertex, dest_vertex = heapq.heappop(heap)
+        if explored[dest_vertex]:
+            continue
+
+        explored[dest_vertex] = True
+        edges.append((vertices[vertex], vertices[dest_vertex], weight))
+        for edge in range(indptr[dest_vertex], indptr[dest_vertex + 1]):
+            if not explored[indices[edge]]:
+                heapq.heappush(heap, (weights[edge], dest_vertex, indices[edge]))
+
+    return edges
+
+
+def eager_prim(graph):
+    """
+    Performs Prim's algorithm using an indexed min-priority queue holding the cheapest known edge to each unexplored
+    vertex, running in O(E log V) time. The queue never holds more than V entries.
+
+    :param graph: Graph, or dictionary representing the graph. Each vertex is a key and its value is a list of tuples
+                  representing each edge from that vertex. E.g. {'u': [('v', 3), ('x', 1)]} means that vertex u has an
+                  edge of length 3 to vertex v, and also an edge of length 1 to vertex x.
+    :return: A list of tuples where each tuple is an edge in the MST e.g. ('u', 'v', 3) represents the edge between u
+             and v with weight 3. Only the tree containing the first vertex is returned if the graph is disconnected
+    """
+    graph = as_graph(graph)
+    vertices = graph.vertices
+    indptr, indices, weights, _ = graph.undirected_csr()
+    if len(vertices) == 0:
+        return []
+    indptr = indptr.tolist()
+    indices = indices.tolist()
+    weights = weights.tolist()
+
+    explored = [False] * len(vertices)
+    parents = [-1] * len(vertices)
+    queue = _IndexedMinPQ(len(vertices))
+    queue.push_or_decrease(0, 0)
+
+    edges = []
+    while len(queue) > 0:
+        vertex, weight = queue.pop()
+        explored[vertex] = True
+        if parents[vertex] >= 0:
+            edges.append((vertices[parents[vertex]], vertices[vertex], weight))
+
+        for edge in range(indptr[vertex], indptr[vertex + 1]):
+            dest_vertex = indices[edge]
+            if not explored[dest_vertex] and queue.push_or_decrease(dest_vertex, weights[edge]):
+                parents[dest_vertex] = vertex
+
+    return edges
+
+
+def dense_prim(adjacency_matrix, vertices=None):
+    """
+    Performs Prim's algorithm on a graph given as an adjacency matrix, running in O(V^2) time with each step vectorized
+    using NumPy. This is faster than the heap-based variants on dense graphs.
+
+    :param adjacency_matrix: Square NumPy array where position [u, v] is the weight of the edge between u and v, or
+                             np.inf if there is no such edge
+    :param vertices: Optional list of vertex names, where a vertex's position is its row in the matrix. If not given,
+                     the row numbers are used as the names
+    :return: A list of tuples where each tuple is an edge in the MST e.g. ('u', 'v', 3) represents the edge between u
+             and v with weight 3. Only the tree containing the first vertex is returned if the graph is disconnected
+    """
+    vertex_count = len(adjacency_matrix)
+    if vertices is None:
+        vertices = list(range(vertex_count))
+    if vertex_count == 0:
+        return []
+
+    explored = np.zeros(vertex_count, dtype=bool)
+    explored[0] = True
+    costs = np.array(adjacency_matrix[0], dtype=np.float64)
+    costs[0] = np.inf
+    parents = np.zeros(vertex_count, dtype=np.int64)
+
+    edges = []
+    for _ in range(vertex_count - 1):
+        next_vertex = int(np.argmin(costs))
+        if costs[next_vertex] == np.inf:
+            break
+
+        edges.append((vertices[parents[next_vertex]], vertices[next_vertex],
+                      adjacency_matrix[parents[next_vertex], next_vertex].item()))
+        explored[next_vertex] = True
+        costs[next_vertex] = np.inf
+
+        improved = (adjacency_matrix[next_vertex] < costs) & ~explored
+        costs[improved] = adjacency_matrix[next_vertex][improved]
+        parents[improved] = next_vertex
+
+    return edges
+
+
+def adaptive_prim(graph):
+    """
+    Performs Prim's algorithm, choosing between eager_prim and dense_prim based on how dense the graph is
+
+    :param graph: Graph, or dictionary representing the graph. Each vertex is a key and its value is a list of tuples
+                  representing each edge from that vertex. E.g. {'u': [('v', 3), ('x', 1)]} means that vertex u has an
+                  edge of length 3 to vertex v, and also an edge of length 1 to vertex x.
+    :return: A list of tuples where each tuple is an edge in the MST e.g. ('u', 'v', 3) represents the edge between u
+             and v with weight 3. Only the tree containing the first vertex is returned if the graph is disconnected
+    """
+    graph = as_graph(graph)
+    vertex_count = graph.vertex_count
+    edge_count = len(graph.indices) / 2
+    if vertex_count > 0 and edge_count / vertex_count ** 2 > DENSE_PRIM_THRESHOLD:
+        edges = dense_prim(graph.adjacency_matrix(), graph.vertices)
+        # The adjacency matrix holds floats so that missing edges can be np.inf, so integer weights are cast back
+        if np.issubdtype(np.asarray(graph.weights).dtype, np.integer):
+            edges = [(first_vertex, second_vertex, int(weight)) for first_vertex, second_vertex, weight in edges]
+        return edges
+    else:
+        return eager_prim(graph)
+
+
 def kruskal(graph):
     """
     Performs Kruskal's algorithm on a weighted graph to find the Minimum Spanning Tree
@@ -40,7 +197,7 @@ def kruskal(graph):
     :return: A list of tuples where each tuple is an edge in the MST e.g. ('u', 'v', 3) represents the edge between u
              and v with weight 3
     """
-    sorted_edges = sorted(_convert_graph_to_edges(graph), key=lambda x: x[2])
+    sorted_edges = sorted(convert_graph_to_edges(graph), key=lambda x: x[2])
 
     covered_vertices = []
     mst_edges = []
@@ -49,7 +206,7 @@ def kruskal(graph):
         current_edge = sorted_edges[i]
         first_vertex = current_edge[0]
         second_vertex = current_edge[1]
-        if not _cycle_present(_convert_edges_to_graph(mst_edges + [current_edge])):
+        if not _cycle_present(convert_edges_to_graph(mst_edges + [current_edge])):
             mst_edges.append(current_edge)
             covered_vertices += [first_vertex, second_vertex]
         i += 1
@@ -57,6 +214,52 @@ def kruskal(graph):
     return mst_edges
 
 
+def union_find_kruskal(graph, spanning_forest=False):
+    """
+    Performs Kruskal's algorithm using a disjoint-set (union by rank with path compression) to detect cycles, running in
+    O(E log E) time. Edges are held in NumPy arrays and sorted with a single argsort, and the algorithm stops as soon as
+    V - 1 edges have been accepted.
+
+    :param graph: Graph, or dictionary representing the graph. Each vertex is a key and its value is a list of tuples
+                  representing each edge from that vertex. E.g. {'u': [('v', 3), ('x', 1)]} means that vertex u has an
+                  edge of length 3 to vertex v, and also an edge of length 1 to vertex x.
+    :param spanning_forest: Whether to find the Minimum Spanning Forest of a graph which may be disconnected
+    :return: A list of tuples where each tuple is an edge in the MST e.g. ('u', 'v', 3) represents the edge between u
+             and v with weight 3. None if the graph is disconnected. If spanning_forest is True, a list containing one
+             such list of edges for each connected component is returned instead
+    """
+    graph = as_graph(graph)
+    vertices = graph.vertices
+    first_vertices, second_vertices, weights = graph.undirected_edge_arrays()
+    order = np.argsort(weights, kind='stable')
+    first_vertices = first_vertices.tolist()
+    second_vertices = second_vertices.tolist()
+
+    parents = list(range(len(vertices)))
+    ranks = [0] * len(vertices)
+    accepted_edges = []
+    for edge in order.tolist():
+        if len(accepted_edges) == len(vertices) - 1:
+            break
+
+        if _union(parents, ranks, first_vertices[edge], second_vertices[edge]):
+            accepted_edges.append(edge)
+
+    mst_edges = [(vertices[first_vertices[edge]], vertices[second_vertices[edge]], weights[edge].item())
+                 for edge in accepted_edges]
+
+    if not spanning_forest:
+        return mst_edges if len(mst_edges) == len(vertices) - 1 or len(vertices) == 0 else None
+
+    components = {}
+    for edge, mst_edge in zip(accepted_edges, mst_edges):
+        components.setdefault(_find_root(parents, first_vertices[edge]), []).append(mst_edge)
+    for vertex in range(len(vertices)):
+        components.setdefault(_find_root(parents, vertex), [])
+
+    return list(components.values())
+
+
 def reverse_delete(graph):
     """
     Performs the Reverse-Delete algorithm on a weighted graph to find the Minimum Spanning Tree
@@ -83,97 +286,224 @@ def reverse_delete(graph):
 
         cycle = _find_cycle(graph)
 
-    return _convert_graph_to_edges(graph)
+    return convert_graph_to_edges(graph)
 
 
-def _convert_graph_to_edges(graph):
+def bidirectional_reverse_delete(graph):
     """
-    Converts a dictionary representing a graph into a list of tuples representing edges
-
-    :param graph: Dictionary representing the graph. Each vertex is a key and its value is a list of tuples representing
-                  each edge from that vertex. E.g. {'u': [('v', 3), ('x', 1)]} means that vertex u has an edge of length
-                  3 to vertex v, and also an edge of length 1 to vertex x.
+    Performs the Reverse-Delete algorithm without modifying the given graph. Edges are sorted by decreasing weight
+    once, and each edge is deleted if its vertices stay connected without it. Connectivity is checked on the remaining
+    graph by searching outwards from both vertices in turn, which stops as soon as the searches meet, or once the
+    smaller side has been explored if the edge is a bridge. This is O(E (V + E)) in the worst case, but each search
+    usually only explores a small part of the graph.
+
+    This shares no code with union_find_kruskal beyond the Graph's directed edge arrays, so the two can be used to
+    check each other.
+
+    :param graph: Graph, or dictionary representing the graph. Each vertex is a key and its value is a list of tuples
+                  representing each edge from that vertex. E.g. {'u': [('v', 3), ('x', 1)]} means that vertex u has an
+                  edge of length 3 to vertex v, and also an edge of length 1 to vertex x.
     :return: A list of tuples where each tuple is an edge in the MST e.g. ('u', 'v', 3) represents the edge between u
-             and v with weight 3
+             and v with weight 3. A Minimum Spanning Forest is returned if the graph is disconnected
     """
-    edges = []
-    for vertex, vertex_edges in graph.items():
-        for vertex_edge in vertex_edges:
-            if (vertex_edge[0], vertex, vertex_edge[1]) not in edges:
-                edges.append((vertex, vertex_edge[0], vertex_edge[1]))
+    graph = as_graph(graph)
+    vertices = graph.vertices
+    first_vertices, second_vertices, weights = graph.edge_arrays()
+    # Of edges with equal weights, the last listed is deleted first
+    deletion_order = np.argsort(weights, kind='stable')[::-1].tolist()
+    first_vertices = first_vertices.tolist()
+    second_vertices = np.asarray(second_vertices).tolist()
+
+    # The remaining edges at each vertex. Both directions of an edge listed from each of its vertices are kept, and
+    # the first one considered is always deleted as the other still joins the vertices
+    remaining_edges = [set() for _ in range(len(vertices))]
+    for edge, (first_vertex, second_vertex) in enumerate(zip(first_vertices, second_vertices)):
+        remaining_edges[first_vertex].add(edge)
+        remaining_edges[second_vertex].add(edge)
+
+    kept_edges = []
+    for edge in deletion_order:
+        first_vertex, second_vertex = first_vertices[edge], second_vertices[edge]
+        remaining_edges[first_vertex].discard(edge)
+        remaining_edges[second_vertex].discard(edge)
+        if not _still_connected(remaining_edges, first_vertices, second_vertices, first_vertex, second_vertex):
+            remaining_edges[first_vertex].add(edge)
+            remaining_edges[second_vertex].add(edge)
+            kept_edges.append(edge)
+    kept_edges.sort()
+
+    return [(vertices[first_vertices[edge]], vertices[second_vertices[edge]], weights[edge].item())
+            for edge in kept_edges]
+
+
+def _still_connected(remaining_edges, first_vertices, second_vertices, first_vertex, second_vertex):
+    """
+    Finds whether two vertices are connected by the remaining edges, with a depth-first search from each vertex taking
+    one step at a time in turn. If they are not connected, the search from the smaller side runs out first.
+
+    :param remaining_edges: List where each position holds the set of remaining edges at that vertex
+    :param first_vertices: List of the ID of the first vertex of each edge
+    :param second_vertices: List of the ID of the second vertex of each edge
+    :param first_vertex: ID of the first vertex
+    :param second_vertex: ID of the second vertex
+    :return: Whether the vertices are connected
+    """
+    if first_vertex == second_vertex:
+        return True
 
-    return edges
+    seen = ({first_vertex}, {second_vertex})
+    stacks = ([first_vertex], [second_vertex])
+    side = 0
+    while stacks[0] and stacks[1]:
+        vertex = stacks[side].pop()
+        for edge in remaining_edges[vertex]:
+            dest_vertex = first_vertices[edge] if first_vertices[edge] != vertex else second_vertices[edge]
+            if dest_vertex in seen[1 - side]:
+                return True
+            if dest_vertex not in seen[side]:
+                seen[side].add(dest_vertex)
+                stacks[side].append(dest_vertex)
+        side = 1 - side
 
+    return False
 
-def _convert_edges_to_graph(edges):
+
+def _find_root(parents, vertex):
     """
-    Converts a list of tuples representing edges into a dictionary representing the whole graph
+    Finds the root of the set containing a vertex in a disjoint-set, halving the path to the root along the way
 
-    :param edges: A list of tuples where each tuple is an edge in the MST e.g. ('u', 'v', 3) represents the edge between u
-                  and v with weight 3
-    :return: Dictionary representing the graph. Each vertex is a key and its value is a list of tuples representing
-             each edge from that vertex. E.g. {'u': [('v', 3), ('x', 1)]} means that vertex u has an edge of length
-             3 to vertex v, and also an edge of length 1 to vertex x.
+    :param parents: List where each position holds the parent of that vertex in the disjoint-set
+    :param vertex: ID of the vertex to find the root of
+    :return: ID of the root vertex
     """
-    graph = {}
-    for edge in edges:
-        first_vertex = edge[0]
-        second_vertex = edge[1]
-        weight = edge[2]
-        if first_vertex in graph.keys():
-            graph.get(first_vertex).append((second_vertex, weight))
-        else:
-            graph.update({first_vertex: [(second_vertex, weight)]})
+    while parents[vertex] != vertex:
+        parents[vertex] = parents[parents[vertex]]
+        vertex = parents[vertex]
 
-        if second_vertex in graph.keys():
-            graph.get(second_vertex).append((first_vertex, weight))
-        else:
-            graph.update({second_vertex: [(first_vertex, weight)]})
+    return vertex
 
-    return graph
 
+def _union(parents, ranks, first_vertex, second_vertex):
+    """
+    Merges the sets containing two vertices in a disjoint-set, attaching the root of lower rank beneath the other
 
-def _find_cycle(graph, current_vertex=None, previous_vertex=None, already_visited_vertices=None):
+    :param parents: List where each position holds the parent of that vertex in the disjoint-set
+    :param ranks: List where each position holds an upper bound on the height of that root's tree
+    :param first_vertex: ID of the first vertex
+    :param second_vertex: ID of the second vertex
+    :return: Whether the sets were merged. False if the vertices were already in the same set
     """
-    Analyses a graph to see if it contains a cycle by recursively following each possible path from each vertex.
-    If the same vertex is seen twice on a given path, then that path must contain a cycle, and hence a cycle is present
-    within the graph.
+    first_root = _find_root(parents, first_vertex)
+    second_root = _find_root(parents, second_vertex)
+    if first_root == second_root:
+        return False
+
+    if ranks[first_root] < ranks[second_root]:
+        first_root, second_root = second_root, first_root
+    parents[second_root] = first_root
+    if ranks[first_root] == ranks[second_root]:
+        ranks[first_root] += 1
+
+    return True
+
+
+def find_cycle(graph):
+    """
+    Finds a cycle in an undirected graph using an iterative depth-first search, running in O(V + E) time without
+    recursion. Visited state and parent pointers are kept in flat lists indexed by vertex ID.
+
+    :param graph: Graph, or dictionary representing the graph. Each vertex is a key and its value is a list of tuples
+                  representing each edge from that vertex. E.g. {'u': [('v', 3), ('x', 1)]} means that vertex u has an
+                  edge of length 3 to vertex v, and also an edge of length 1 to vertex x.
+    :return: A list of tuples where each tuple is an edge on the cycle, in order around it e.g. ('u', 'v', 3)
+             represents the edge between u and v with weight 3. None if the graph does not contain a cycle
+    """
+    graph = as_graph(graph)
+    vertices = graph.vertices
+    indptr, indices, weights, edge_ids = graph.undirected_csr()
+    cycle = _find_cycle_ids(indptr, indices, edge_ids)
+    if cycle is None:
+        return None
+
+    cycle_vertices, cycle_edges = cycle
+    edge_weights = np.empty(len(edge_ids), dtype=weights.dtype)
+    edge_weights[edge_ids] = weights
+
+    return [(vertices[cycle_vertices[i]], vertices[cycle_vertices[i + 1]], edge_weights[cycle_edges[i]].item())
+            for i in range(len(cycle_edges))]
+
+
+def _find_cycle(graph):
+    """
+    Analyses a graph to see if it contains a cycle using an iterative depth-first search
 
     :param graph: The graph to check
-    The below parameters start as None and are only set on recursive calls:
-    :param current_vertex: Current vertex we are on within the graph
-    :param previous_vertex: Previous vertex we just visited (do not want to go backwards on the path)
-    :param already_visited_vertices: List of vertices we have already visited on the current path
     :return: List of vertices which result in a cycle (begins and ends with the same vertex), or None if one does not
              exist
     """
-    if len(graph) == 0:
+    graph = as_graph(graph)
+    indptr, indices, _, edge_ids = graph.undirected_csr()
+    cycle = _find_cycle_ids(indptr, indices, edge_ids)
+    if cycle is None:
         return None
 
-    if already_visited_vertices is None:
-        already_visited_vertices = []
+    return [graph.vertices[vertex] for vertex in cycle[0]]
 
-    if current_vertex is None:
-        for vertex in graph.keys():
-            cycle = _find_cycle(graph, vertex)
-            if cycle:
-                return cycle
-        return None
-    else:
-        if current_vertex in already_visited_vertices:
-            already_visited_vertices.append(current_vertex)
-            return already_visited_vertices[already_visited_vertices.index(current_vertex):]
-        elif len(graph.get(current_vertex)) == 0:
-            return None
-        else:
-            already_visited_vertices.append(current_vertex)
 
-            for edge in graph.get(current_vertex):
-                if edge[0] != previous_vertex:
-                    cycle = _find_cycle(graph, edge[0], current_vertex, already_visited_vertices)
-                    if cycle:
-                        return cycle
-            return None
+def _find_cycle_ids(indptr, indices, edge_ids):
+    """
+    Searches a CSR adjacency for a cycle using a depth-first search with an explicit stack. In an undirected depth-first
+    search, the first edge found to an already visited vertex (other than the edge just arrived along) leads back to an
+    ancestor on the stack, so the cycle is that edge plus the tree path between the two vertices.
+
+    :param indptr: Array where the edges out of vertex i are at positions indptr[i] to indptr[i + 1]
+    :param indices: Array of the destination vertex of each edge
+    :param edge_ids: Array of the undirected edge each entry belongs to, shared by both of its directions
+    :return: A tuple of the list of vertex IDs around the cycle (begins and ends with the same vertex) and the list of
+             edge IDs between them, or None if there is no cycle
+    """
+    vertex_count = len(indptr) - 1
+    indptr = indptr.tolist()
+    indices = indices.tolist()
+    edge_ids = edge_ids.tolist()
+
+    visited = [False] * vertex_count
+    parent_vertices = [-1] * vertex_count
+    parent_edges = [-1] * vertex_count
+    next_edges = indptr[:-1]
+
+    for root in range(vertex_count):
+        if visited[root]:
+            continue
+        visited[root] = True
+        stack = [root]
+
+        while stack:
+            vertex = stack[-1]
+            if next_edges[vertex] == indptr[vertex + 1]:
+                stack.pop()
+                continue
+
+            edge = next_edges[vertex]
+            next_edges[vertex] += 1
+            if edge_ids[edge] == parent_edges[vertex]:
+                continue
+
+            dest_vertex = indices[edge]
+            if not visited[dest_vertex]:
+                visited[dest_vertex] = True
+                parent_vertices[dest_vertex] = vertex
+                parent_edges[dest_vertex] = edge_ids[edge]
+                stack.append(dest_vertex)
+            else:
+                cycle_vertices = [dest_vertex, vertex]
+                cycle_edges = [edge_ids[edge]]
+                while cycle_vertices[-1] != dest_vertex:
+                    cycle_edges.append(parent_edges[cycle_vertices[-1]])
+                    cycle_vertices.append(parent_vertices[cycle_vertices[-1]])
+                return cycle_vertices, cycle_edges
+
+    return None
 
 
 def _cycle_present(graph):
@@ -189,24 +519,232 @@ def _cycle_present(graph):
         return False
 
 
-graph = {
-    'x': [('y', 1), ('a', 4), ('b', 6)],
-    'y': [('x', 1), ('z', 3)],
-    'a': [('x', 4), ('z', 10), ('b', 20)],
-    'b': [('x', 6), ('a', 20), ('c', 9)],
-    'z': [('y', 3), ('a', 10), ('d', 5)],
-    'c': [('b', 9), ('d', 2)],
-    'd': [('c', 2), ('z', 5)]
-}
+def _random_graph(vertex_count, density, max_weight=100):
+    """
+    Generates a random connected undirected graph, used for benchmarking
+
+    :param vertex_count: Number of vertices in the graph
+    :param density: Fraction of the V^2 possible vertex pairs joined by an edge
+    :param max_weight: Largest possible edge weight
+    :return: Dictionary representing the graph, in the same format taken by prim
+    """
+    graph = {vertex: [] for vertex in range(vertex_count)}
+    edge_count = max(int(density * vertex_count ** 2), vertex_count - 1)
+    for edge in range(edge_count):
+        if edge < vertex_count - 1:
+            # A path through every vertex keeps the graph connected
+            first_vertex, second_vertex = edge, edge + 1
+        else:
+            first_vertex, second_vertex = random.randrange(vertex_count), random.randrange(vertex_count)
+        weight = random.randint(1, max_weight)
+        graph.get(first_vertex).append((second_vertex, weight))
+        graph.get(second_vertex).append((first_vertex, weight))
+
+    return graph
+
+
+def _check_reverse_delete(vertex_count, trials):
+    """
+    Checks union_find_kruskal against bidirectional_reverse_delete on random graphs. The two share no code for choosing
+    edges, so a tree of the same total weight from both is good evidence that each is correct.
+
+    :param vertex_count: Number of vertices in each graph
+    :param trials: Number of graphs to check
+    """
+    for _ in range(trials):
+        random_graph = Graph.from_dict(_random_graph(vertex_count, random.choice([0.01, 0.05, 0.2])))
+        kruskal_edges = union_find_kruskal(random_graph)
+        reverse_delete_edges = bidirectional_reverse_delete(random_graph)
+
+        assert len(kruskal_edges) == len(reverse_delete_edges) == vertex_count - 1
+        assert sum(edge[2] for edge in kruskal_edges) == sum(edge[2] for edge in reverse_delete_edges)
+
+    print('Spanning trees matching Kruskal:', trials, 'of', trials)
+
+
+def _benchmark_prim(vertex_count, densities):
+    """
+    Times lazy_prim, eager_prim and dense_prim on random graphs of increasing density, showing where dense_prim
+    overtakes the heap-based variants. Each is given a new Graph sharing the same arrays, so the times include building
+    the view each one needs (the adjacency matrix for dense_prim) but not converting the dictionary, as adaptive_prim
+    would be run
+
+    :param vertex_count: Number of vertices in each graph
+    :param densities: List of edge densities (E / V^2) to time
+    """
+    for density in densities:
+        random_graph = Graph.from_dict(_random_graph(vertex_count, density))
+        arrays = (random_graph.vertices, random_graph.indptr, random_graph.indices, random_graph.weights)
+
+        s = time.time()
+        lazy_weight = sum(edge[2] for edge in lazy_prim(Graph(*arrays)))
+        lazy_time = time.time() - s
+
+        s = time.time()
+        eager_weight = sum(edge[2] for edge in eager_prim(Graph(*arrays)))
+        eager_time = time.time() - s
+
+        s = time.time()
+        new_graph = Graph(*arrays)
+        dense_weight = sum(edge[2] for edge in dense_prim(new_graph.adjacency_matrix(), new_graph.vertices))
+        dense_time = time.time() - s
 
-mst = prim(graph)
-# Expected (in any order): [('c', 'd', 2), ('d', 'z', 5), ('z', 'y', 3), ('y', 'x', 1), ('x', 'a', 4), ('x', 'b', 6)]
-print(mst)
+        assert lazy_weight == eager_weight == dense_weight
+        print('Density', density, 'lazy_prim:', lazy_time, 'eager_prim:', eager_time, 'dense_prim:', dense_time)
 
-mst = kruskal(graph)
-# Expected (specific order): [('x', 'y', 1), ('c', 'd', 2), ('y', 'z', 3), ('x', 'a', 4), ('z', 'd', 5), ('x', 'b', 6)]
-print(mst)
 
-mst = reverse_delete(graph)
-# Expected (in any order): [('c', 'd', 2), ('d', 'z', 5), ('z', 'y', 3), ('y', 'x', 1), ('x', 'a', 4), ('x', 'b', 6)]
-print(mst)
+class _IndexedMinPQ:
+    """
+    Binary min-heap of integer keys 0 to n - 1, each with a priority, which supports lowering the priority of a key
+    already in the heap in O(log n) time
+    """
+
+    def __init__(self, capacity):
+        """
+        :param capacity: Number of possible keys
+        """
+        self._heap = []
+        self._positions = [-1] * capacity
+        self._priorities = [None] * capacity
+
+    def __len__(self):
+        return len(self._heap)
+
+    def push_or_decrease(self, key, priority):
+        """
+        Adds a key to the heap, or lowers its priority if it is already present. Keys which have already been popped
+        are ignored
+
+        :param key: The key to add
+        :param priority: The priority of the key
+        :return: Whether the heap was changed
+        """
+        position = self._positions[key]
+        if position == -2:
+            return False
+        elif position == -1:
+            self._heap.append(key)
+            position = len(self._heap) - 1
+        elif priority >= self._priorities[key]:
+            return False
+
+        self._priorities[key] = priority
+        self._positions[key] = position
+        self._sift_up(position)
+        return True
+
+    def pop(self):
+        """
+        Removes the key with the lowest priority from the heap
+
+        :return: A tuple of the key and its priority
+        """
+        key = self._heap[0]
+        last_key = self._heap.pop()
+        self._positions[key] = -2  # never re-added once removed
+        if self._heap:
+            self._heap[0] = last_key
+            self._positions[last_key] = 0
+            self._sift_down(0)
+
+        return key, self._priorities[key]
+
+    def _sift_up(self, position):
+        key = self._heap[position]
+        while position > 0:
+            parent = (position - 1) // 2
+            parent_key = self._heap[parent]
+            if self._priorities[parent_key] <= self._priorities[key]:
+                break
+            self._heap[position] = parent_key
+            self._positions[parent_key] = position
+            position = parent
+        self._heap[position] = key
+        self._positions[key] = position
+
+    def _sift_down(self, position):
+        key = self._heap[position]
+        while True:
+            child = 2 * position + 1
+            if child >= len(self._heap):
+                break
+            if child + 1 < len(self._heap) and \
+               self._priorities[self._heap[child + 1]] < self._priorities[self._heap[child]]:
+                child += 1
+            child_key = self._heap[child]
+            if self._priorities[key] <= self._priorities[child_key]:
+                break
+            self._heap[position] = child_key
+            self._positions[child_key] = position
+            position = child
+        self._heap[position] = key
+        self._positions[key] = position
+
+
+# Other modules import this one, so the examples only run when it is executed directly
+if __name__ == '__main__':
+    graph = {
+        'x': [('y', 1), ('a', 4), ('b', 6)],
+        'y': [('x', 1), ('z', 3)],
+        'a': [('x', 4), ('z', 10), ('b', 20)],
+        'b': [('x', 6), ('a', 20), ('c', 9)],
+        'z': [('y', 3), ('a', 10), ('d', 5)],
+        'c': [('b', 9), ('d', 2)],
+        'd': [('c', 2), ('z', 5)]
+    }
+
+    mst = prim(graph)
+    # Expected (in any order): [('c', 'd', 2), ('d', 'z', 5), ('z', 'y', 3), ('y', 'x', 1), ('x', 'a', 4), ('x', 'b', 6)]
+    print(mst)
+
+    mst = lazy_prim(graph)
+    # Expected (in any order): [('c', 'd', 2), ('d', 'z', 5), ('z', 'y', 3), ('y', 'x', 1), ('x', 'a', 4), ('x', 'b', 6)]
+    print(mst)
+
+    mst = eager_prim(graph)
+    # Expected (in any order): [('c', 'd', 2), ('d', 'z', 5), ('z', 'y', 3), ('y', 'x', 1), ('x', 'a', 4), ('x', 'b', 6)]
+    print(mst)
+
+    compact_graph = Graph.from_dict(graph)
+    mst = dense_prim(compact_graph.adjacency_matrix(), compact_graph.vertices)
+    # Expected (in any order): [('c', 'd', 2.0), ('d', 'z', 5.0), ('z', 'y', 3.0), ('y', 'x', 1.0), ('x', 'a', 4.0),
+    #                           ('x', 'b', 6.0)]
+    print(mst)
+
+    # The graph is dense enough for dense_prim to be used, but the weights stay integers
+    mst = adaptive_prim(compact_graph)
+    # Expected (in any order): [('c', 'd', 2), ('d', 'z', 5), ('z', 'y', 3), ('y', 'x', 1), ('x', 'a', 4), ('x', 'b', 6)]
+    print(mst)
+
+    cycle = find_cycle(graph)
+    # Expected (any cycle): [('x', 'a', 4), ('a', 'z', 10), ('z', 'y', 3), ('y', 'x', 1)]
+    print(cycle)
+
+    path_graph = convert_edges_to_graph([(vertex, vertex + 1, 1) for vertex in range(100000)] + [(100000, 0, 1)])
+    # Expected: 100001
+    print(len(find_cycle(path_graph)))
+
+    _benchmark_prim(1000, [0.01, 0.05, 0.1, 0.2, 0.3, 0.5])
+
+    mst = kruskal(graph)
+    # Expected (specific order): [('x', 'y', 1), ('c', 'd', 2), ('y', 'z', 3), ('x', 'a', 4), ('z', 'd', 5), ('x', 'b', 6)]
+    print(mst)
+
+    mst = union_find_kruskal(graph)
+    # Expected (specific order): [('x', 'y', 1), ('c', 'd', 2), ('y', 'z', 3), ('x', 'a', 4), ('z', 'd', 5), ('x', 'b', 6)]
+    print(mst)
+
+    forest = union_find_kruskal({'u': [('v', 1)], 'v': [('u', 1)], 'w': [('x', 2)], 'x': [('w', 2)]},
+                                spanning_forest=True)
+    # Expected: [[('u', 'v', 1)], [('w', 'x', 2)]]
+    print(forest)
+
+    mst = bidirectional_reverse_delete(graph)
+    # Expected (in any order): [('c', 'd', 2), ('d', 'z', 5), ('z', 'y', 3), ('y', 'x', 1), ('x', 'a', 4), ('x', 'b', 6)]
+    print(mst)
+
+    _check_reverse_delete(200, 10)
+
+    mst = reverse_delete(graph)
+    # Expected (in any order): [('c', 'd', 2), ('d', 'z', 5), ('z', 'y', 3), ('y', 'x', 1), ('x', 'a', 4), ('x', 'b', 6)]
+    print(mst)
@@ -1,3 +1,10 @@
+import numpy as np
+import os
+import tempfile
+
+# Maximum number of sorted runs merged together at once by external_partition. Each run gets a block of the memory
+# available, so merging every run at once would leave tiny blocks and spend most of the time looping over runs
+MERGE_FAN_IN = 16
 
 
 def partition(distinct_numbers):
@@ -9,19 +16,170 @@ def partition(distinct_numbers):
     """
     pairings = []
     if len(distinct_numbers) % 2 == 0:
-        list.sort(distinct_numbers)
-
-        middle_point = int(len(distinct_numbers) / 2)
-        first_half = distinct_numbers[:middle_point]
-        second_half = distinct_numbers[middle_point:]
-        second_half.reverse()
+        # Sorted into a new list so the caller's list is not changed
+        sorted_numbers = sorted(distinct_numbers)
 
-        pairings = tuple(zip(first_half, second_half))
+        middle_point = len(sorted_numbers) // 2
+        pairings = tuple(zip(sorted_numbers[:middle_point], reversed(sorted_numbers)))
 
     return pairings
 
 
-distinct_numbers = [23, 9, -6, 11, -10, 2, 4, 7]
-pairings = partition(distinct_numbers)
-# Expected: [(-10, 23), (-6, 11), (2, 9), (4, 7)]
-print(pairings)
+def numpy_partition(distinct_numbers):
+    """
+    Solves the Partitioning problem in NumPy without changing the input. The numbers are sorted into a new array, then
+    the front half is paired with the reversed back half in one vectorised assignment.
+
+    :param distinct_numbers: NumPy array or list of distinct real numbers
+    :return: A tuple consisting of the following:
+                - n/2 by 2 NumPy array where each row is a pairing of numbers such that the maximum sum of two numbers
+                  in a pair is minimized. None if an error occurs
+                - an error message, None if one does not occur
+    """
+    sorted_numbers = np.sort(np.asarray(distinct_numbers))
+    if sorted_numbers.ndim != 1 or len(sorted_numbers) % 2 != 0:
+        return None, 'Numbers must be a flat sequence of even length'
+
+    middle_point = len(sorted_numbers) // 2
+    pairings = np.empty((middle_point, 2), dtype=sorted_numbers.dtype)
+    pairings[:, 0] = sorted_numbers[:middle_point]
+    pairings[:, 1] = sorted_numbers[:middle_point - 1:-1]
+
+    return pairings, None
+
+
+def external_partition(input_path, dtype=np.float64, chunk_size=1 << 20, temp_dir=None):
+    """
+    Solves the Partitioning problem on numbers stored in a binary file, which may be larger than memory. The file is
+    read through a memory map and sorted with an external merge sort: sorted runs of chunk_size numbers are written to
+    a temporary file, then merged into a second one. The pairings are then read from both ends of the sorted file.
+
+    :param input_path: Path to a file of distinct numbers stored back to back in binary, as written by ndarray.tofile
+    :param dtype: NumPy dtype of the numbers in the file
+    :param chunk_size: Maximum number of numbers held in memory at once
+    :param temp_dir: Directory to write the temporary files to, if not given the system's default is used
+    :return: A tuple consisting of the following:
+                - generator of NumPy arrays of up to chunk_size by 2, where each row is a pairing of numbers such that
+                  the maximum sum of two numbers in a pair is minimized. None if an error occurs
+                - an error message, None if one does not occur
+    """
+    dtype = np.dtype(dtype)
+    file_size = os.path.getsize(input_path)
+    if file_size % dtype.itemsize != 0 or (file_size // dtype.itemsize) % 2 != 0:
+        return None, 'File must hold an even number of numbers'
+
+    return _external_partition_chunks(input_path, dtype, file_size // dtype.itemsize, chunk_size, temp_dir), None
+
+
+def _external_partition_chunks(input_path, dtype, n, chunk_size, temp_dir):
+    """
+    Sorts the numbers in a file with an external merge sort and yields their pairings in chunks
+
+    :param input_path: Path to a file of numbers stored back to back in binary
+    :param dtype: NumPy dtype of the numbers in the file
+    :param n: Number of numbers in the file, which is even
+    :param chunk_size: Maximum number of numbers held in memory at once
+    :param temp_dir: Directory to write the temporary files to, None for the system's default
+    :return: Generator of NumPy arrays of up to chunk_size by 2 of pairings
+    """
+    if n == 0:
+        return
+
+    with tempfile.TemporaryDirectory(dir=temp_dir) as directory:
+        numbers = np.memmap(input_path, dtype=dtype, mode='r', shape=(n,))
+        runs = np.memmap(os.path.join(directory, 'runs'), dtype=dtype, mode='w+', shape=(n,))
+        run_bounds = list(range(0, n, chunk_size)) + [n]
+        for start in run_bounds[:-1]:
+            runs[start:start + chunk_size] = np.sort(numbers[start:start + chunk_size])
+
+        # Each pass merges groups of runs into the other file, until a single sorted run is left
+        merged_runs = np.memmap(os.path.join(directory, 'merged'), dtype=dtype, mode='w+', shape=(n,))
+        while len(run_bounds) > 2:
+            run_bounds = _merge_pass(runs, run_bounds, merged_runs, chunk_size)
+            runs, merged_runs = merged_runs, runs
+        del merged_runs
+        sorted_numbers = runs
+        del runs
+
+        middle_point = n // 2
+        for start in range(0, middle_point, chunk_size):
+            end = min(start + chunk_size, middle_point)
+            pairings = np.empty((end - start, 2), dtype=dtype)
+            pairings[:, 0] = sorted_numbers[start:end]
+            pairings[:, 1] = sorted_numbers[n - end:n - start][::-1]
+            yield pairings
+        del sorted_numbers
+
+
+def _merge_pass(runs, run_bounds, output, chunk_size):
+    """
+    Merges each group of up to MERGE_FAN_IN neighbouring sorted runs into one, so the number of runs shrinks by that
+    factor with each pass over the numbers
+
+    :param runs: Array holding the sorted runs back to back
+    :param run_bounds: List of the position where each run starts, followed by the length of runs
+    :param output: Array the same length as runs to write the merged runs to
+    :param chunk_size: Maximum number of numbers held in memory at once
+    :return: List of the position where each merged run starts, followed by the length of runs
+    """
+    for first_run in range(0, len(run_bounds) - 1, MERGE_FAN_IN):
+        _merge_runs(runs, run_bounds[first_run:first_run + MERGE_FAN_IN + 1], output, chunk_size)
+
+    return run_bounds[:-1:MERGE_FAN_IN] + run_bounds[-1:]
+
+
+def _merge_runs(runs, run_bounds, output, chunk_size):
+    """
+    Merges neighbouring sorted runs into one sorted run in the same place of the output, holding only a block of each
+    run in memory at a time. In each step every number no larger than the smallest last number of the blocks of runs
+    which still have numbers left to read can be written, as no number still to be read is smaller than it.
+
+    :param runs: Array holding the sorted runs back to back
+    :param run_bounds: List of the position where each run to merge starts, followed by the position after the last
+    :param output: Array to write the merged run to
+    :param chunk_size: Maximum number of numbers held in memory at once
+    """
+    run_count = len(run_bounds) - 1
+    block_size = max(chunk_size // (2 * run_count), 1)
+    positions = run_bounds[:-1]
+    blocks = [runs[0:0] for _ in range(run_count)]
+    written = run_bounds[0]
+    while written < run_bounds[-1]:
+        for run in range(run_count):
+            if len(blocks[run]) == 0 and positions[run] < run_bounds[run + 1]:
+                end = min(positions[run] + block_size, run_bounds[run + 1])
+                blocks[run] = np.array(runs[positions[run]:end])
+                positions[run] = end
+
+        unread_lasts = [blocks[run][-1] for run in range(run_count) if positions[run] < run_bounds[run + 1]]
+        parts = []
+        for run in range(run_count):
+            if unread_lasts:
+                count = np.searchsorted(blocks[run], min(unread_lasts), side='right')
+            else:
+                count = len(blocks[run])
+            parts.append(blocks[run][:count])
+            blocks[run] = blocks[run][count:]
+
+        merged = np.sort(np.concatenate(parts))
+        output[written:written + len(merged)] = merged
+        written += len(merged)
+
+
+# The examples write temporary files, so they only run when this module is executed directly
+if __name__ == '__main__':
+    distinct_numbers = [23, 9, -6, 11, -10, 2, 4, 7]
+    pairings = partition(distinct_numbers)
+    # Expected: [(-10, 23), (-6, 11), (2, 9), (4, 7)]
+    print(pairings)
+
+    pairings, _ = numpy_partition(np.array([23, 9, -6, 11, -10, 2, 4, 7]))
+    # Expected: [[-10, 23], [-6, 11], [2, 9], [4, 7]]
+    print(pairings.tolist())
+
+    with tempfile.TemporaryDirectory() as directory:
+        input_path = os.path.join(directory, 'numbers')
+        np.array([23, 9, -6, 11, -10, 2, 4, 7], dtype=np.float64).tofile(input_path)
+        chunks, _ = external_partition(input_path, chunk_size=3)
+        # Expected: [[-10.0, 23.0], [-6.0, 11.0], [2.0, 9.0], [4.0, 7.0]]
+        print([pairing for chunk in chunks for pairing in chunk.tolist()])
@@ -1,6 +1,11 @@
 import numpy as np
+import heapq
 import math
+import random
 import sys
+import time
+
+from graph import as_graph, convert_graph_to_edges
 
 
 def dijkstra(graph, start_vertex):
@@ -33,6 +38,92 @@ def dijkstra(graph, start_vertex):
     return distances
 
 
+def heap_dijkstra(graph, start_vertex, target_vertex=None, return_predecessors=False):
+    """
+    Performs the Dijkstra algorithm using a binary heap, running in O((V + E) log V) time. The graph is converted once
+    into a compressed sparse row (CSR) adjacency before the search begins, unless it is already a Graph.
+
+    :param graph: Graph, or dictionary representing the graph. Each vertex is a key and its value is a list of tuples
+                  representing each edge from that vertex. E.g. {'u': [('v', 3), ('x', 1)]} means that vertex u has an
+                  edge of length 3 to vertex v, and also an edge of length 1 to vertex x.
+    :param start_vertex: The start vertex to calculate all distances from
+    :param target_vertex: Optional vertex to stop at. If given, the search exits as soon as its distance is final, and
+                          only the vertices whose distances were final by then are returned
+    :param return_predecessors: Whether to also return the predecessor of each vertex on its shortest path
+    :return: A dictionary where each reachable vertex is a key and its shortest distance from the start vertex is its
+             value. If return_predecessors is True, a tuple of the distances and a dictionary mapping each reachable
+             vertex to its predecessor (None for the start vertex) is returned instead
+    """
+    graph = as_graph(graph)
+    vertices = graph.vertices
+    target_id = graph.vertex_ids.get(target_vertex) if target_vertex is not None else None
+
+    distances, predecessors, finalised = _csr_dijkstra(graph, graph.vertex_ids[start_vertex], target_id)
+
+    # After stopping early at the target, vertices reached but not yet finalised only have tentative distances
+    reached = sorted(finalised)
+    vertex_distances = {vertices[i]: distances[i] for i in reached}
+    if not return_predecessors:
+        return vertex_distances
+
+    vertex_predecessors = {vertices[i]: vertices[predecessors[i]] if predecessors[i] >= 0 else None for i in reached}
+    return vertex_distances, vertex_predecessors
+
+
+def reconstruct_path(predecessors, target_vertex):
+    """
+    Follows a dictionary of predecessors back from a target vertex to rebuild the shortest path to it
+
+    :param predecessors: Dictionary mapping each vertex to its predecessor, as returned by heap_dijkstra
+    :param target_vertex: The vertex to find the path to
+    :return: List of vertices from the start vertex to the target vertex, or None if the target was not reached
+    """
+    if target_vertex not in predecessors:
+        return None
+
+    path = [target_vertex]
+    while predecessors.get(path[-1]) is not None:
+        path.append(predecessors.get(path[-1]))
+    path.reverse()
+
+    return path
+
+
+def _csr_dijkstra(graph, source, target=None):
+    """
+    Runs Dijkstra's algorithm over the CSR adjacency of a Graph. Decrease-key is performed lazily by pushing a new heap
+    entry and skipping entries which are stale when popped. Distances are only kept for the vertices reached, so a
+    search which stops early at its target costs no more than the part of the graph it visits.
+
+    :param graph: Graph to search
+    :param source: Integer ID of the start vertex
+    :param target: Optional integer ID of a vertex to stop at once its distance is final
+    :return: A tuple of a dictionary of the distance of each reached vertex, a dictionary of the predecessor of each
+             reached vertex (-1 if none) and a set of the vertices whose distances are final
+    """
+    distances = {source: 0}
+    predecessors = {source: -1}
+    finalised = set()
+
+    heap = [(0, source)]
+    while heap:
+        distance, vertex = heapq.heappop(heap)
+        if vertex in finalised:
+            continue
+        finalised.add(vertex)
+        if vertex == target:
+            break
+
+        for dest_vertex, weight in zip(*graph.out_edges(vertex)):
+            new_distance = distance + weight
+            if new_distance < distances.get(dest_vertex, math.inf):
+                distances[dest_vertex] = new_distance
+                predecessors[dest_vertex] = vertex
+                heapq.heappush(heap, (new_distance, dest_vertex))
+
+    return distances, predecessors, finalised
+
+
 def bellman_ford(graph, start_vertex):
     """
     Performs the Bellman-Ford algorithm to find the shortest distance between one vertex and all other vertices in a
@@ -44,7 +135,7 @@ def bellman_ford(graph, start_vertex):
     :param start_vertex: The start vertex to calculate all distances from
     :return: A dictionary where each vertex is a key and its shortest distance from the start vertex is its value
     """
-    edges = _convert_graph_to_edges(graph)
+    edges = convert_graph_to_edges(graph)
     shortest_distances = []
     for i in range(len(graph)):
         if i == 0:
@@ -66,48 +157,148 @@ def bellman_ford(graph, start_vertex):
     return shortest_distances[len(graph) - 1]
 
 
-def _convert_graph_to_edges(graph):
+def vectorized_bellman_ford(graph, start_vertex):
     """
-    Converts a dictionary representing a graph into a list of tuples representing edges
+    Performs the Bellman-Ford algorithm with every edge relaxed at once on each round using NumPy. Only the previous
+    and current rows of distances are kept, so memory is O(V + E), and the algorithm stops early once a round changes
+    nothing.
 
-    :param graph: Dictionary representing the graph. Each vertex is a key and its value is a list of tuples representing
-                  each edge from that vertex. E.g. {'u': [('v', 3), ('x', 1)]} means that vertex u has an edge of length
-                  3 to vertex v, and also an edge of length 1 to vertex x.
-    :return: A list of tuples where each tuple is an edge in the MST e.g. ('u', 'v', 3) represents the edge between u
-             and v with weight 3
-    """
-    edges = []
-    for vertex, vertex_edges in graph.items():
-        for vertex_edge in vertex_edges:
-            if (vertex_edge[0], vertex, vertex_edge[1]) not in edges:
-                edges.append((vertex, vertex_edge[0], vertex_edge[1]))
-
-    return edges
-
-
-graph = {
-    's': [('u', 1), ('x', 4), ('v', 2)],
-    'u': [('v', 3), ('x', 1)],
-    'x': [('y', 2), ('z', 2)],
-    'y': [],
-    'v': [('x', 2), ('z', 3)],
-    'z': []
-}
-start_vertex = 's'
-
-distances = dijkstra(graph, start_vertex)
-
-# Expected: {'s': 0, 'u': 1, 'v': 2, 'x': 2, 'z': 4, 'y': 4}
-print(distances)
-
-graph = {
-    's': [('u', 1), ('x', -4), ('v', 2)],
-    'u': [('v', 3), ('x', 1)],
-    'x': [('y', -2), ('z', 2)],
-    'y': [],
-    'v': [('x', 2), ('z', -3)],
-    'z': []
-}
-distances = bellman_ford(graph, start_vertex)
-# Expected: {'s': 0, 'u': 1, 'x': -4, 'y': -6, 'v': 2, 'z': -1}
-print(distances)
+    :param graph: Graph, or dictionary representing the graph. Each vertex is a key and its value is a list of tuples
+                  representing each edge from that vertex. E.g. {'u': [('v', 3), ('x', 1)]} means that vertex u has an
+                  edge of length 3 to vertex v, and also an edge of length 1 to vertex x.
+    :param start_vertex: The start vertex to calculate all distances from
+    :return: A tuple consisting of the following:
+                - a dictionary where each reachable vertex is a key and its shortest distance from the start vertex is
+                  its value. None if an error occurs
+                - an error message if a negative cycle is reachable from the start vertex, None if one is not
+    """
+    graph = as_graph(graph)
+    vertices = graph.vertices
+    sources, destinations, weights = graph.edge_arrays()
+    start_id = graph.vertex_ids[start_vertex]
+
+    previous_distances = np.full(len(vertices), np.inf)
+    previous_distances[start_id] = 0
+
+    converged = False
+    for _ in range(len(vertices)):
+        current_distances = previous_distances.copy()
+        np.minimum.at(current_distances, destinations, previous_distances[sources] + weights)
+        if np.array_equal(current_distances, previous_distances):
+            converged = True
+            break
+        previous_distances = current_distances
+
+    # The loop runs one more round than the V - 1 needed, so any change on the last round means a negative cycle
+    if not converged:
+        return None, 'Negative cycle detected'
+
+    is_integral = np.issubdtype(weights.dtype, np.integer)
+    distances = {}
+    for i in np.flatnonzero(np.isfinite(previous_distances)):
+        distance = previous_distances[i].item()
+        distances.update({vertices[i]: int(distance) if is_integral else distance})
+
+    return distances, None
+
+
+def _random_graph(vertex_count, edges_per_vertex, max_weight=100):
+    """
+    Generates a random connected directed graph, used for benchmarking
+
+    :param vertex_count: Number of vertices in the graph
+    :param edges_per_vertex: Number of edges out of each vertex
+    :param max_weight: Largest possible edge weight
+    :return: Dictionary representing the graph, in the same format taken by dijkstra
+    """
+    graph = {}
+    for vertex in range(vertex_count):
+        # The edge to vertex + 1 keeps every vertex reachable from vertex 0
+        vertex_edges = [((vertex + 1) % vertex_count, random.randint(1, max_weight))]
+        vertex_edges += [(random.randrange(vertex_count), random.randint(1, max_weight))
+                         for _ in range(edges_per_vertex - 1)]
+        graph.update({vertex: vertex_edges})
+
+    return graph
+
+
+def _benchmark_dijkstra(vertex_counts, edges_per_vertex=4, include_original=True):
+    """
+    Times dijkstra against heap_dijkstra on random graphs of increasing size. The time per (V + E) log V should stay
+    roughly constant for heap_dijkstra, while it grows with V for dijkstra.
+
+    :param vertex_counts: List of graph sizes to time
+    :param edges_per_vertex: Number of edges out of each vertex
+    :param include_original: Whether to also time the original dijkstra, which is very slow on large graphs
+    """
+    for vertex_count in vertex_counts:
+        random_graph = _random_graph(vertex_count, edges_per_vertex)
+        scale = (vertex_count + vertex_count * edges_per_vertex) * math.log2(vertex_count)
+
+        s = time.time()
+        heap_distances = heap_dijkstra(random_graph, 0)
+        heap_time = time.time() - s
+        print('V =', vertex_count, 'heap_dijkstra:', heap_time, 'seconds,', heap_time / scale * 1e9,
+              'ns per (V + E) log V')
+
+        if include_original:
+            s = time.time()
+            original_distances = dijkstra(random_graph, 0)
+            original_time = time.time() - s
+            assert original_distances == heap_distances
+            print('V =', vertex_count, 'dijkstra:', original_time, 'seconds,', original_time / scale * 1e9,
+                  'ns per (V + E) log V')
+
+
+# The benchmark runs the slow original dijkstra, so the examples only run when this module is executed directly
+if __name__ == '__main__':
+    graph = {
+        's': [('u', 1), ('x', 4), ('v', 2)],
+        'u': [('v', 3), ('x', 1)],
+        'x': [('y', 2), ('z', 2)],
+        'y': [],
+        'v': [('x', 2), ('z', 3)],
+        'z': []
+    }
+    start_vertex = 's'
+
+    distances = dijkstra(graph, start_vertex)
+
+    # Expected: {'s': 0, 'u': 1, 'v': 2, 'x': 2, 'z': 4, 'y': 4}
+    print(distances)
+
+    distances, predecessors = heap_dijkstra(graph, start_vertex, return_predecessors=True)
+    # Expected: {'s': 0, 'u': 1, 'x': 2, 'y': 4, 'v': 2, 'z': 4}
+    print(distances)
+    # Expected: ['s', 'u', 'x', 'y']
+    print(reconstruct_path(predecessors, 'y'))
+
+    # Expected: {'s': 0, 'u': 1, 'x': 2}
+    print(heap_dijkstra(graph, start_vertex, target_vertex='x'))
+
+    _benchmark_dijkstra([250, 500, 1000])
+
+    graph = {
+        's': [('u', 1), ('x', -4), ('v', 2)],
+        'u': [('v', 3), ('x', 1)],
+        'x': [('y', -2), ('z', 2)],
+        'y': [],
+        'v': [('x', 2), ('z', -3)],
+        'z': []
+    }
+    distances = bellman_ford(graph, start_vertex)
+    # Expected: {'s': 0, 'u': 1, 'x': -4, 'y': -6, 'v': 2, 'z': -1}
+    print(distances)
+
+    distances, error_message = vectorized_bellman_ford(graph, start_vertex)
+    # Expected: {'s': 0, 'u': 1, 'x': -4, 'y': -6, 'v': 2, 'z': -2} (bellman_ford only relaxes the cheapest edge into z)
+    print(distances)
+
+    graph = {
+        's': [('u', 1)],
+        'u': [('v', -3)],
+        'v': [('s', 1)]
+    }
+    distances, error_message = vectorized_bellman_ford(graph, start_vertex)
+    # Expected: Negative cycle detected
+    print(error_message)
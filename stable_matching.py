@@ -1,3 +1,14 @@
+import numpy as np
+import heapq
+import numbers
+import os
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import shared_memory
+
+# Arrays in shared memory which a batch proposal worker process has attached to, set up by _attach_y_ranks
+_worker_arrays = {}
 
 
 def gale_shapley(x_preferences, y_preferences):
@@ -42,6 +53,364 @@ def gale_shapley(x_preferences, y_preferences):
         return None, 'Invalid input'
 
 
+def fast_gale_shapley(x_preferences, y_preferences):
+    """
+    Performs the Gale-Shapley algorithm in O(n^2) time, without modifying the given preferences. The x's and y's are
+    converted to integer IDs and the work is done by gale_shapley_ids.
+
+    :param x_preferences: Dictionary with x's as the keys and the values are a list of y's in decreasing order of
+                          preference
+    :param y_preferences: Dictionary with y's as the keys and the values are a list of x's in decreasing order of
+                          preference
+    :return: A tuple consisting of the following:
+                - a dictionary with x's as the keys and the matched y as the values. None if an error occurs
+                - an error message, None if one does not occur
+    """
+    xs = list(x_preferences.keys())
+    ys = list(y_preferences.keys())
+    x_ids = {x: i for i, x in enumerate(xs)}
+    y_ids = {y: i for i, y in enumerate(ys)}
+    if len(xs) != len(ys):
+        return None, 'Invalid input'
+    if len(xs) == 0:
+        return {}, None
+
+    try:
+        x_preference_matrix = np.array([[y_ids[y] for y in x_preferences.get(x)] for x in xs], dtype=np.int64)
+        y_preference_matrix = np.array([[x_ids[x] for x in y_preferences.get(y)] for y in ys], dtype=np.int64)
+    except (KeyError, ValueError):  # an unknown x or y, or lists of different lengths
+        return None, 'Invalid input'
+
+    matched_ys, error_message = gale_shapley_ids(x_preference_matrix.reshape(len(xs), -1),
+                                                 y_preference_matrix.reshape(len(ys), -1))
+    if error_message:
+        return None, error_message
+
+    return {x: ys[y] for x, y in zip(xs, matched_ys.tolist())}, None
+
+
+def gale_shapley_ids(x_preference_matrix, y_preference_matrix):
+    """
+    Performs the Gale-Shapley algorithm on x's and y's numbered from 0 to n - 1, in O(n^2) time. Free x's wait in a
+    queue, each x keeps a pointer to the next y it will propose to, and each y compares proposals using a precomputed
+    matrix of the rank it gives each x.
+
+    :param x_preference_matrix: n by n NumPy array where row i lists the y's in decreasing order of preference of x i
+    :param y_preference_matrix: n by n NumPy array where row i lists the x's in decreasing order of preference of y i
+    :return: A tuple consisting of the following:
+                - a NumPy array where position i is the y matched with x i. None if an error occurs
+                - an error message, None if one does not occur
+    """
+    if not _is_valid_matrix_input(x_preference_matrix, y_preference_matrix):
+        return None, 'Invalid input'
+
+    n = len(x_preference_matrix)
+    # y_ranks[y, x] is the position of x in the preferences of y
+    y_ranks = np.empty((n, n), dtype=np.int32 if n < 2 ** 31 else np.int64)
+    y_ranks[np.arange(n)[:, None], y_preference_matrix] = np.arange(n)
+
+    next_proposals = [0] * n
+    fiances = [-1] * n
+    free_xs = deque(range(n))
+    while free_xs:
+        x = free_xs[0]
+        y = x_preference_matrix[x, next_proposals[x]].item()
+        next_proposals[x] += 1
+
+        fiance = fiances[y]
+        if fiance == -1:
+            fiances[y] = x
+            free_xs.popleft()
+        elif y_ranks[y, x] < y_ranks[y, fiance]:
+            fiances[y] = x
+            free_xs[0] = fiance
+
+    matched_ys = np.empty(n, dtype=np.int64)
+    matched_ys[fiances] = np.arange(n)
+
+    return matched_ys, None
+
+
+def batch_gale_shapley_ids(x_preference_matrix, y_preference_matrix, workers=1, chunk_size=1 << 12,
+                           return_stats=False):
+    """
+    Performs the Gale-Shapley algorithm in rounds, as in McVitie and Wilson's formulation. In each round every free x
+    proposes to its next y at once, and each y keeps the best of its offers and its current x, found with a grouped
+    argmin over ranks in NumPy. The matching found is the same x-optimal one as gale_shapley_ids, as the order of
+    proposals does not affect the result.
+
+    With more than one worker, the matrix of ranks is filled in by a pool of processes, each taking a share of the y's,
+    and it is kept in shared memory so that it is never copied between processes. Rounds with more than chunk_size
+    offers are also split between the pool by y. Smaller rounds, such as the long tail of rounds where only a few x's
+    are still free, are handled directly as they are not worth sending to the pool.
+
+    :param x_preference_matrix: n by n NumPy array where row i lists the y's in decreasing order of preference of x i
+    :param y_preference_matrix: n by n NumPy array where row i lists the x's in decreasing order of preference of y i
+    :param workers: Number of processes to find the best offers with
+    :param chunk_size: Largest number of offers in a round which is handled directly rather than by the pool
+    :param return_stats: Whether to also return the number of rounds and proposals made
+    :return: A tuple consisting of the following:
+                - a NumPy array where position i is the y matched with x i. None if an error occurs
+                - an error message, None if one does not occur
+             If return_stats is True, a dictionary with the number of 'rounds', 'proposals' and 'pooled_rounds' (rounds
+             split between the pool) is added to the end
+    """
+    if not _is_valid_matrix_input(x_preference_matrix, y_preference_matrix):
+        return (None, 'Invalid input', None) if return_stats else (None, 'Invalid input')
+
+    n = len(x_preference_matrix)
+    if workers == 1:
+        y_ranks = np.empty((n, n), dtype=np.int32)
+        _fill_y_ranks(y_ranks, y_preference_matrix, 0, n)
+        matched_ys, stats = _propose_in_rounds(x_preference_matrix, y_ranks, None, chunk_size)
+    else:
+        size = max(n * n * np.dtype(np.int32).itemsize, 1)
+        ranks_memory = shared_memory.SharedMemory(create=True, size=size)
+        preferences_memory = shared_memory.SharedMemory(create=True, size=size)
+        try:
+            y_ranks = np.ndarray((n, n), dtype=np.int32, buffer=ranks_memory.buf)
+            shared_preferences = np.ndarray((n, n), dtype=np.int32, buffer=preferences_memory.buf)
+            shared_preferences[:] = y_preference_matrix
+            with ProcessPoolExecutor(workers, initializer=_attach_y_ranks,
+                                     initargs=(ranks_memory.name, preferences_memory.name, n)) as executor:
+                shard_bounds = np.linspace(0, n, workers + 1).astype(np.int64).tolist()
+                list(executor.map(_fill_y_ranks_shard, shard_bounds[:-1], shard_bounds[1:]))
+                matched_ys, stats = _propose_in_rounds(x_preference_matrix, y_ranks, (executor, workers),
+                                                       chunk_size)
+            del y_ranks, shared_preferences  # the shared memory cannot be closed while an array still uses it
+        finally:
+            for memory in [ranks_memory, preferences_memory]:
+                memory.close()
+                memory.unlink()
+
+    return (matched_ys, None, stats) if return_stats else (matched_ys, None)
+
+
+def hospitals_residents(x_preferences, y_preferences, y_capacities):
+    """
+    Finds a stable many-to-one matching where each y can be matched with several x's, up to its capacity, and
+    preference lists may be incomplete. The x's make the offers, so the implementation is x-optimal. An x can only be
+    matched with a y which each ranks. Each y holds its current x's in a heap keyed by rank, so that its worst x can be
+    displaced in O(log c) time. Memory grows with the total length of the preference lists rather than with n^2.
+
+    :param x_preferences: Dictionary with x's as the keys and the values are a list of acceptable y's in decreasing
+                          order of preference
+    :param y_preferences: Dictionary with y's as the keys and the values are a list of acceptable x's in decreasing
+                          order of preference
+    :param y_capacities: Dictionary with y's as the keys and the values are the number of x's each can be matched with
+    :return: A tuple consisting of the following:
+                - a dictionary with x's as the keys and the matched y as the values (None if the x is unmatched). None
+                  if an error occurs
+                - an error message, None if one does not occur
+    """
+    if not _is_valid_sparse_input(x_preferences, y_preferences, y_capacities):
+        return None, 'Invalid input'
+
+    xs = list(x_preferences.keys())
+    ys = list(y_preferences.keys())
+    x_ids = {x: i for i, x in enumerate(xs)}
+    y_ids = {y: i for i, y in enumerate(ys)}
+    x_preference_lists = [[y_ids[y] for y in x_preferences.get(x)] for x in xs]
+    # y_ranks[y] maps each x which y finds acceptable to its position in the preferences of y
+    y_ranks = [{x_ids[x]: rank for rank, x in enumerate(y_preferences.get(y))} for y in ys]
+    capacities = [y_capacities.get(y) for y in ys]
+
+    next_proposals = [0] * len(xs)
+    assignees = [[] for _ in ys]  # heap of (-rank, x) for each y, so the worst x is first
+    matched_ys = [None] * len(xs)
+    free_xs = deque(range(len(xs)))
+    while free_xs:
+        x = free_xs.popleft()
+        while matched_ys[x] is None and next_proposals[x] < len(x_preference_lists[x]):
+            y = x_preference_lists[x][next_proposals[x]]
+            next_proposals[x] += 1
+
+            rank = y_ranks[y].get(x)
+            if rank is None:
+                continue
+            if len(assignees[y]) < capacities[y]:
+                heapq.heappush(assignees[y], (-rank, x))
+                matched_ys[x] = y
+            elif -assignees[y][0][0] > rank:
+                _, displaced_x = heapq.heapreplace(assignees[y], (-rank, x))
+                matched_ys[displaced_x] = None
+                free_xs.append(displaced_x)
+                matched_ys[x] = y
+
+    return {x: ys[y] if y is not None else None for x, y in zip(xs, matched_ys)}, None
+
+
+def _propose_in_rounds(x_preference_matrix, y_ranks, pool, chunk_size):
+    """
+    Runs rounds of proposals until every x is matched
+
+    :param x_preference_matrix: n by n NumPy array where row i lists the y's in decreasing order of preference of x i
+    :param y_ranks: n by n NumPy array where position [y, x] is the rank y gives x
+    :param pool: None to find the best offers in this process, or a tuple of a ProcessPoolExecutor whose workers are
+                 attached to y_ranks and the number of workers
+    :param chunk_size: Largest number of offers in a round which is handled directly rather than by the pool
+    :return: A tuple of a NumPy array where position i is the y matched with x i, and a dictionary with the number of
+             'rounds', 'proposals' and 'pooled_rounds' made
+    """
+    n = len(x_preference_matrix)
+
+    next_proposals = np.zeros(n, dtype=np.int64)
+    fiances = np.full(n, -1, dtype=np.int64)
+    free_xs = np.arange(n)
+    rounds = 0
+    proposals = 0
+    pooled_rounds = 0
+    while len(free_xs) > 0:
+        offered_ys = x_preference_matrix[free_xs, next_proposals[free_xs]]
+        next_proposals[free_xs] += 1
+        rounds += 1
+        proposals += len(free_xs)
+
+        if pool is None or len(free_xs) <= chunk_size:
+            ys, best_xs, best_ranks = _best_offers(y_ranks, offered_ys, free_xs)
+        else:
+            pooled_rounds += 1
+            executor, workers = pool
+            shards = [offered_ys % workers == worker for worker in range(workers)]
+            results = list(executor.map(_best_offers_shard, [offered_ys[shard] for shard in shards],
+                                        [free_xs[shard] for shard in shards]))
+            ys, best_xs, best_ranks = (np.concatenate(arrays) for arrays in zip(*results))
+
+        current_xs = fiances[ys]
+        current_ranks = np.where(current_xs >= 0, y_ranks[ys, np.maximum(current_xs, 0)], n)
+        accepted = best_ranks < current_ranks
+        fiances[ys[accepted]] = best_xs[accepted]
+
+        # Every x which proposed and was not accepted stays free, along with every x which was displaced
+        still_free = np.ones(n, dtype=bool)
+        still_free[best_xs[accepted]] = False
+        displaced_xs = current_xs[accepted & (current_xs >= 0)]
+        free_xs = np.concatenate((free_xs[still_free[free_xs]], displaced_xs))
+
+    matched_ys = np.empty(n, dtype=np.int64)
+    matched_ys[fiances] = np.arange(n)
+
+    return matched_ys, {'rounds': rounds, 'proposals': proposals, 'pooled_rounds': pooled_rounds}
+
+
+def _best_offers(y_ranks, offered_ys, offering_xs):
+    """
+    Finds the best offer each y received in a round
+
+    :param y_ranks: n by n NumPy array where position [y, x] is the rank y gives x
+    :param offered_ys: Array of the y each offer was made to
+    :param offering_xs: Array of the x which made each offer
+    :return: A tuple of arrays of each y which received an offer, the best x to offer to it, and that x's rank
+    """
+    offer_ranks = y_ranks[offered_ys, offering_xs]
+    order = np.lexsort((offer_ranks, offered_ys))
+    sorted_ys = offered_ys[order]
+    # The first offer for each y after sorting is its best
+    is_first = np.ones(len(order), dtype=bool)
+    is_first[1:] = sorted_ys[1:] != sorted_ys[:-1]
+    best = order[is_first]
+
+    return offered_ys[best], offering_xs[best], offer_ranks[best]
+
+
+def _fill_y_ranks(y_ranks, y_preference_matrix, start, stop):
+    """
+    Fills in the rank each of a range of y's gives each x
+
+    :param y_ranks: n by n NumPy array where position [y, x] is to hold the rank y gives x
+    :param y_preference_matrix: n by n NumPy array where row i lists the x's in decreasing order of preference of y i
+    :param start: First y to fill in
+    :param stop: The y after the last to fill in
+    """
+    n = len(y_preference_matrix)
+    y_ranks[np.arange(start, stop)[:, None], y_preference_matrix[start:stop]] = np.arange(n)
+
+
+def _attach_y_ranks(ranks_name, preferences_name, n):
+    """
+    Attaches a batch proposal worker process to the matrices of ranks and preferences of the y's in shared memory
+
+    :param ranks_name: Name of the shared memory block holding the ranks
+    :param preferences_name: Name of the shared memory block holding the preferences of the y's
+    :param n: Number of x's and y's
+    """
+    ranks_memory = shared_memory.SharedMemory(name=ranks_name)
+    preferences_memory = shared_memory.SharedMemory(name=preferences_name)
+    _worker_arrays.update({
+        'memory': (ranks_memory, preferences_memory),
+        'y_ranks': np.ndarray((n, n), dtype=np.int32, buffer=ranks_memory.buf),
+        'y_preference_matrix': np.ndarray((n, n), dtype=np.int32, buffer=preferences_memory.buf)
+    })
+
+
+def _fill_y_ranks_shard(start, stop):
+    """
+    Fills in the rank each of a range of y's gives each x, from within a worker process
+
+    :param start: First y to fill in
+    :param stop: The y after the last to fill in
+    """
+    _fill_y_ranks(_worker_arrays.get('y_ranks'), _worker_arrays.get('y_preference_matrix'), start, stop)
+
+
+def _best_offers_shard(offered_ys, offering_xs):
+    """
+    Finds the best offer each y in one share of the y's received, from within a worker process
+
+    :param offered_ys: Array of the y each offer was made to
+    :param offering_xs: Array of the x which made each offer
+    :return: A tuple of arrays of each y which received an offer, the best x to offer to it, and that x's rank
+    """
+    return _best_offers(_worker_arrays.get('y_ranks'), offered_ys, offering_xs)
+
+
+def _random_preference_matrix(n, correlation):
+    """
+    Generates random preferences, used for benchmarking. Each side scores the other with a mix of a score shared by
+    everyone and a score of its own.
+
+    :param n: Number of x's and y's
+    :param correlation: How much of each score is shared, from 0 (independent preferences) to 1 (identical ones)
+    :return: n by n NumPy array where each row lists the other side in decreasing order of preference
+    """
+    scores = correlation * np.random.rand(n) + (1 - correlation) * np.random.rand(n, n)
+    return np.argsort(-scores, axis=1)
+
+
+def _benchmark_batch_gale_shapley(n, correlations, worker_counts):
+    """
+    Compares gale_shapley_ids with batch_gale_shapley_ids on random preferences, printing the rounds, proposals and
+    time taken by each
+
+    :param n: Number of x's and y's
+    :param correlations: List of how correlated the preferences are, from 0 to 1
+    :param worker_counts: List of numbers of workers to time batch_gale_shapley_ids with
+    """
+    # The pool can only be faster than a single process when there are spare CPUs for its workers
+    print('CPUs available:', os.cpu_count())
+    for correlation in correlations:
+        x_preference_matrix = _random_preference_matrix(n, correlation)
+        y_preference_matrix = _random_preference_matrix(n, correlation)
+
+        s = time.time()
+        matched_ys, _ = gale_shapley_ids(x_preference_matrix, y_preference_matrix)
+        sequential_time = time.time() - s
+        # Each x proposes to every y it prefers to its match, and then to its match
+        x_ranks = np.argsort(x_preference_matrix, axis=1)
+        proposals = (x_ranks[np.arange(n), matched_ys] + 1).sum().item()
+        print('Correlation', correlation, 'sequential: proposals', proposals, 'time',
+              sequential_time)
+
+        for workers in worker_counts:
+            s = time.time()
+            batch_matched_ys, _, stats = batch_gale_shapley_ids(x_preference_matrix, y_preference_matrix, workers,
+                                                                return_stats=True)
+            batch_time = time.time() - s
+            assert (batch_matched_ys == matched_ys).all()
+            print('Correlation', correlation, 'batch with', workers, 'workers: rounds', stats.get('rounds'),
+                  'pooled rounds', stats.get('pooled_rounds'), 'proposals', stats.get('proposals'), 'time', batch_time)
+
+
 def _get_unmatched_x_has_remaining_offers(matchings, x_preferences):
     """
     If an x exists without a match, who has not yet made an offer to every y, then this method will return the value of
@@ -85,40 +454,120 @@ def _is_valid_input(x_preferences, y_preferences):
     return True
 
 
-hospital_preferences = {
-    'h1': ['s1', 's2', 's3'],
-    'h2': ['s2', 's1', 's3'],
-    'h3': ['s1', 's2', 's3']
-}
+def _is_valid_matrix_input(x_preference_matrix, y_preference_matrix):
+    """
+    Checks whether a given input to gale_shapley_ids is valid.
+    To be a valid input, both matrices must be n by n and each row must contain every number from 0 to n - 1.
+
+    :param x_preference_matrix: n by n NumPy array where row i lists the y's in decreasing order of preference of x i
+    :param y_preference_matrix: n by n NumPy array where row i lists the x's in decreasing order of preference of y i
+    :return: Whether or not the given input is valid
+    """
+    n = len(x_preference_matrix)
+    for preference_matrix in (x_preference_matrix, y_preference_matrix):
+        if preference_matrix.shape != (n, n):
+            return False
+        if n > 0 and not (np.sort(preference_matrix, axis=1) == np.arange(n)).all():
+            return False
+
+    return True
+
+
+def _is_valid_sparse_input(x_preferences, y_preferences, y_capacities):
+    """
+    Checks whether a given input to hospitals_residents is valid, in time linear in the total length of the preference
+    lists.
+    To be a valid input, each list of preferences must only contain known x's or y's, with no repeats, and every y must
+    have a positive whole number capacity.
+
+    :param x_preferences: Dictionary with x's as the keys and the values are a list of y's in decreasing order of
+                          preference
+    :param y_preferences: Dictionary with y's as the keys and the values are a list of x's in decreasing order of
+                          preference
+    :param y_capacities: Dictionary with y's as the keys and the values are the number of x's each can be matched with
+    :return: Whether or not the given input is valid
+    """
+    for preferences, others in ((x_preferences, y_preferences), (y_preferences, x_preferences)):
+        for preference_list in preferences.values():
+            if len(set(preference_list)) != len(preference_list) or any(other not in others
+                                                                        for other in preference_list):
+                return False
+
+    for y in y_preferences.keys():
+        capacity = y_capacities.get(y)
+        if not isinstance(capacity, numbers.Integral) or isinstance(capacity, bool) or capacity < 1:
+            return False
+
+    return True
+
+
+# Worker processes may import this module, so the examples only run when it is executed directly
+if __name__ == '__main__':
+    hospital_preferences = {
+        'h1': ['s1', 's2', 's3'],
+        'h2': ['s2', 's1', 's3'],
+        'h3': ['s1', 's2', 's3']
+    }
+
+    student_preferences = {
+        's1': ['h2', 'h1', 'h3'],
+        's2': ['h1', 'h2', 'h3'],
+        's3': ['h1', 'h2', 'h3']
+    }
+
+    matchings, error_message = gale_shapley(hospital_preferences, student_preferences)
+
+    # Expected: {'h1': 's1', 'h2': 's2', 'h3': 's3'}
+    print('Final Matchings', matchings)
+
+    hospital_preferences = {
+        'h1': ['s3', 's2', 's1', 's4'],
+        'h2': ['s4', 's1', 's3', 's2'],
+        'h3': ['s1', 's2', 's3', 's4'],
+        'h4': ['s1', 's4', 's3', 's2']
+    }
+
+    student_preferences = {
+        's1': ['h4', 'h2', 'h3', 'h1'],
+        's2': ['h1', 'h2', 'h3', 'h4'],
+        's3': ['h1', 'h3', 'h2', 'h4'],
+        's4': ['h2', 'h4', 'h3', 'h1']
+    }
+
+    matchings, error_message = gale_shapley(hospital_preferences, student_preferences)
 
-student_preferences = {
-    's1': ['h2', 'h1', 'h3'],
-    's2': ['h1', 'h2', 'h3'],
-    's3': ['h1', 'h2', 'h3']
-}
+    # Expected: {'h1': 's3', 'h2': 's4', 'h3': 's2', 'h4': 's1'}
+    print('Final Matchings', matchings)
 
-matchings, error_message = gale_shapley(hospital_preferences, student_preferences)
+    # gale_shapley empties the lists of hospital preferences as it goes, so they must be given again
+    hospital_preferences = {
+        'h1': ['s3', 's2', 's1', 's4'],
+        'h2': ['s4', 's1', 's3', 's2'],
+        'h3': ['s1', 's2', 's3', 's4'],
+        'h4': ['s1', 's4', 's3', 's2']
+    }
 
-# Expected: {'h1': 's1', 'h2': 's2', 'h3': 's3'}
-print('Final Matchings', matchings)
+    matchings, error_message = fast_gale_shapley(hospital_preferences, student_preferences)
 
-hospital_preferences = {
-    'h1': ['s3', 's2', 's1', 's4'],
-    'h2': ['s4', 's1', 's3', 's2'],
-    'h3': ['s1', 's2', 's3', 's4'],
-    'h4': ['s1', 's4', 's3', 's2']
-}
+    # Expected: {'h1': 's3', 'h2': 's4', 'h3': 's2', 'h4': 's1'}
+    print('Final Matchings', matchings)
 
-student_preferences = {
-    's1': ['h4', 'h2', 'h3', 'h1'],
-    's2': ['h1', 'h2', 'h3', 'h4'],
-    's3': ['h1', 'h3', 'h2', 'h4'],
-    's4': ['h2', 'h4', 'h3', 'h1']
-}
+    resident_preferences = {
+        'r1': ['h1', 'h2'],
+        'r2': ['h1'],
+        'r3': ['h1', 'h2'],
+        'r4': ['h2'],
+        'r5': ['h2', 'h1']
+    }
 
-matchings, error_message = gale_shapley(hospital_preferences, student_preferences)
+    hospital_preferences = {
+        'h1': ['r5', 'r3', 'r1', 'r2'],
+        'h2': ['r1', 'r3', 'r4']
+    }
 
-# Expected: {'h1': 's3', 'h2': 's4', 'h3': 's2', 'h4': 's1'}
-print('Final Matchings', matchings)
+    matchings, error_message = hospitals_residents(resident_preferences, hospital_preferences, {'h1': 2, 'h2': 2})
 
+    # Expected: {'r1': 'h2', 'r2': None, 'r3': 'h1', 'r4': 'h2', 'r5': 'h1'}
+    print('Final Matchings', matchings)
 
+    _benchmark_batch_gale_shapley(5000, [0, 0.5], [1, 2])
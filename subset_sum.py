@@ -1,3 +1,13 @@
+import numpy as np
+import math
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+
+# Number of SubsetSumIndex objects kept by get_subset_sum_index between calls
+SUBSET_SUM_CACHE_SIZE = 32
+
+# Recently used SubsetSumIndex objects, keyed by their sorted weights with the most recently used last
+_subset_sum_indexes = OrderedDict()
 
 
 def subset_sum(whole_set, max_total_weight):
@@ -31,8 +41,327 @@ def subset_sum(whole_set, max_total_weight):
     return max_weights[len(whole_set)][max_total_weight]
 
 
-whole_set = [25, 15, 10, 20, 5]
-max_total_weight = 35
-max_weight = subset_sum(whole_set, max_total_weight)
-# Expected: 35
-print(max_weight)
+def bitset_subset_sum(whole_set, max_total_weight, return_subset=False):
+    """
+    Solves the Subset Sum problem by holding the set of reachable sums as the bits of an integer. Adding a weight to
+    every reachable sum is then a single shift and or, which costs O(W / 64) machine words per item.
+
+    :param whole_set: List of weights with no duplicates
+    :param max_total_weight: Maximum bound
+    :param return_subset: Whether to also find a subset with the maximum sum. It is found by divide and conquer, so the
+                          full table of reachable sums for every prefix of items is never stored
+    :return: The maximum possible sum of weights which is less than or equal to the maximum bound. If return_subset is
+             True, a tuple of that sum and the list of weights which make it up is returned instead
+    """
+    reachable = _reachable_sums(whole_set, max_total_weight)
+    max_weight = reachable.bit_length() - 1
+    if not return_subset:
+        return max_weight
+
+    return max_weight, _find_subset(whole_set, max_weight)
+
+
+def rolling_subset_sum(whole_set, max_total_weight):
+    """
+    Solves the Subset Sum problem with the same dynamic programming recurrence as subset_sum, but keeping only a single
+    row of maximum weights and updating it for each item with NumPy
+
+    :param whole_set: List of weights with no duplicates
+    :param max_total_weight: Maximum bound
+    :return: The maximum possible sum of weights which is less than or equal to the maximum bound
+    """
+    max_weights = np.zeros(max_total_weight + 1, dtype=np.int64)
+    for weight in whole_set:
+        if weight <= max_total_weight:
+            # The right hand side is evaluated before assigning, so it only uses the previous row
+            max_weights[weight:] = np.maximum(max_weights[weight:],
+                                              max_weights[:max_total_weight + 1 - weight] + weight)
+
+    return max_weights[max_total_weight].item()
+
+
+def meet_in_the_middle_subset_sum(whole_set, max_total_weight, workers=1):
+    """
+    Solves the Subset Sum problem with the Horowitz-Sahni meet-in-the-middle algorithm, in O(2^(n/2) n) time no matter
+    how large the weights are. The sums of every subset of each half of the weights are enumerated as sorted NumPy
+    arrays, and each sum from the first half is paired with the largest sum from the second half which fits within the
+    bound using a binary search.
+
+    With more than one worker, the enumeration of the first half is split across a pool of processes, each taking the
+    subsets with one fixed choice of the first few weights.
+
+    :param whole_set: List of weights with no duplicates. Every sum must fit in a 64 bit integer
+    :param max_total_weight: Maximum bound
+    :param workers: Number of processes to enumerate the first half with
+    :return: The maximum possible sum of weights which is less than or equal to the maximum bound
+    """
+    middle_point = len(whole_set) // 2
+    first_half = whole_set[:middle_point]
+    second_sums = np.sort(_subset_sums(whole_set[middle_point:]))
+
+    if workers == 1:
+        return _best_pairing(_subset_sums(first_half), second_sums, max_total_weight)
+
+    # Each worker takes one combination of the first fixed_count weights, and enumerates the rest of the first half
+    fixed_count = min(max(workers - 1, 0).bit_length(), len(first_half))
+    offsets = _subset_sums(first_half[:fixed_count])
+    remaining_weights = first_half[fixed_count:]
+    with ProcessPoolExecutor(workers) as executor:
+        shard_bests = executor.map(_best_shard_pairing, offsets.tolist(), [remaining_weights] * len(offsets),
+                                   [second_sums] * len(offsets), [max_total_weight] * len(offsets))
+        return max(shard_bests)
+
+
+def adaptive_subset_sum(whole_set, max_total_weight, workers=1):
+    """
+    Solves the Subset Sum problem, choosing between bitset_subset_sum and meet_in_the_middle_subset_sum by comparing
+    their estimated costs. The bitset costs about n W / 64 word operations, and meet-in-the-middle about 2^(n/2) n.
+
+    :param whole_set: List of weights with no duplicates
+    :param max_total_weight: Maximum bound
+    :param workers: Number of processes meet_in_the_middle_subset_sum may use
+    :return: The maximum possible sum of weights which is less than or equal to the maximum bound
+    """
+    set_length = len(whole_set)
+    bitset_cost = set_length * (max_total_weight + 1)
+    # The costs are compared as base 2 logarithms, as 2^(n/2) overflows a float once n is above about 2046
+    if bitset_cost <= 64 or math.log2(bitset_cost) - 6 <= set_length / 2 + math.log2(set_length):
+        return bitset_subset_sum(whole_set, max_total_weight)
+    else:
+        return meet_in_the_middle_subset_sum(whole_set, max_total_weight, workers)
+
+
+class SubsetSumIndex:
+    """
+    Answers Subset Sum queries for many different bounds over the same set of weights. The reachable sums are found once
+    up to the largest bound, then a prefix maximum over them gives the best sum for any bound with a single lookup.
+    """
+
+    def __init__(self, whole_set, max_total_weight):
+        """
+        :param whole_set: List of weights with no duplicates
+        :param max_total_weight: The largest bound which will be queried. Larger bounds are still answered, but the
+                                 reachable sums must be found again to answer them
+        """
+        self.weights = list(whole_set)
+        self.max_total_weight = max_total_weight
+        self._reachable = _reachable_sums(self.weights, max_total_weight)
+        self._best_weights = None
+
+    def add_weights(self, weights):
+        """
+        Adds more weights to the set, updating the reachable sums with one shift and or per weight
+
+        :param weights: List of weights which are not already in the set
+        """
+        mask = (1 << (self.max_total_weight + 1)) - 1
+        for weight in weights:
+            self._reachable = (self._reachable | (self._reachable << weight)) & mask
+        self.weights.extend(weights)
+        self._best_weights = None
+
+    def best_weight(self, max_total_weight):
+        """
+        Finds the maximum possible sum of weights which is less than or equal to a bound
+
+        :param max_total_weight: Maximum bound
+        :return: A tuple consisting of the following:
+                    - the maximum possible sum of weights which is less than or equal to the maximum bound. None if an
+                      error occurs
+                    - an error message, None if one does not occur
+        """
+        best_weights, error_message = self.best_weights([max_total_weight])
+        if error_message:
+            return None, error_message
+
+        return best_weights[0], None
+
+    def best_weights(self, max_total_weights):
+        """
+        Finds the maximum possible sum of weights for each of many bounds
+
+        :param max_total_weights: List or array of maximum bounds
+        :return: A tuple consisting of the following:
+                    - list of the maximum possible sums, in the same order as the bounds. None if an error occurs
+                    - an error message, None if one does not occur
+        """
+        max_total_weights = np.asarray(max_total_weights, dtype=np.int64)
+        # A negative bound would otherwise index the prefix maximum from its end
+        if len(max_total_weights) > 0 and max_total_weights.min() < 0:
+            return None, 'Bounds must not be negative'
+        if len(max_total_weights) > 0 and max_total_weights.max() > self.max_total_weight:
+            self.max_total_weight = max_total_weights.max().item()
+            self._reachable = _reachable_sums(self.weights, self.max_total_weight)
+            self._best_weights = None
+
+        if self._best_weights is None:
+            # Position i is the largest reachable sum which is no more than i
+            reachable = _bits_to_array(self._reachable, self.max_total_weight + 1)
+            dtype = np.int32 if self.max_total_weight < 2 ** 31 else np.int64
+            self._best_weights = np.maximum.accumulate(np.where(reachable, np.arange(len(reachable), dtype=dtype), 0))
+
+        return self._best_weights[max_total_weights].tolist(), None
+
+
+def get_subset_sum_index(whole_set, max_total_weight):
+    """
+    Finds a SubsetSumIndex for a set of weights, reusing one of the last SUBSET_SUM_CACHE_SIZE built if it was for the
+    same weights. The returned index is shared between callers, so weights should not be added to it.
+
+    :param whole_set: List of weights with no duplicates
+    :param max_total_weight: The largest bound which will be queried
+    :return: A SubsetSumIndex for the weights
+    """
+    key = tuple(sorted(whole_set))
+    index = _subset_sum_indexes.get(key)
+    if index is None:
+        index = SubsetSumIndex(whole_set, max_total_weight)
+        _subset_sum_indexes.update({key: index})
+        if len(_subset_sum_indexes) > SUBSET_SUM_CACHE_SIZE:
+            _subset_sum_indexes.popitem(last=False)
+    else:
+        _subset_sum_indexes.move_to_end(key)
+
+    return index
+
+
+def _subset_sums(weights):
+    """
+    Enumerates the sums of every subset of a list of weights
+
+    :param weights: List of weights
+    :return: Array of 2^n sums, where position i is the sum of the weights whose bits are set in i
+    """
+    sums = np.zeros(1, dtype=np.int64)
+    for weight in weights:
+        sums = np.concatenate((sums, sums + weight))
+
+    return sums
+
+
+def _best_pairing(first_sums, second_sums, max_total_weight):
+    """
+    Finds the largest sum of one value from each of two lists of sums which is less than or equal to a bound
+
+    :param first_sums: Array of sums
+    :param second_sums: Sorted array of sums, which must include 0
+    :param max_total_weight: Maximum bound
+    :return: The largest such sum
+    """
+    first_sums = first_sums[first_sums <= max_total_weight]
+    # The position of the largest second sum which fits alongside each first sum. Never -1, as 0 always fits
+    positions = np.searchsorted(second_sums, max_total_weight - first_sums, side='right') - 1
+
+    return (first_sums + second_sums[positions]).max().item()
+
+
+def _best_shard_pairing(offset, weights, second_sums, max_total_weight):
+    """
+    Finds the best pairing for one part of the first half of the weights, from within a worker process
+
+    :param offset: Sum of the fixed weights included in every subset of this part
+    :param weights: The remaining weights of the first half
+    :param second_sums: Sorted array of the sums of every subset of the second half
+    :param max_total_weight: Maximum bound
+    :return: The largest pairing found, or 0 if the offset alone is over the bound
+    """
+    if offset > max_total_weight:
+        return 0
+
+    return _best_pairing(_subset_sums(weights) + offset, second_sums, max_total_weight)
+
+
+def _reachable_sums(weights, max_total_weight):
+    """
+    Finds every sum of a subset of weights which is less than or equal to a bound
+
+    :param weights: List of weights
+    :param max_total_weight: Maximum bound
+    :return: Integer where bit i is set if some subset of the weights sums to i
+    """
+    mask = (1 << (max_total_weight + 1)) - 1
+    reachable = 1
+    for weight in weights:
+        reachable = (reachable | (reachable << weight)) & mask
+
+    return reachable
+
+
+def _find_subset(weights, target_weight):
+    """
+    Finds a subset of weights which sums exactly to a target by splitting the weights in half, finding how much of the
+    target each half must make up, and recursing into each half. Only the reachable sums of the current halves are ever
+    held, so memory stays O(W).
+
+    :param weights: List of weights
+    :param target_weight: The sum to make, which must be reachable
+    :return: List of weights which sum to the target
+    """
+    if target_weight == 0:
+        return []
+    if len(weights) == 1:
+        return list(weights)
+
+    middle_point = len(weights) // 2
+    first_half = weights[:middle_point]
+    second_half = weights[middle_point:]
+
+    first_reachable = _bits_to_array(_reachable_sums(first_half, target_weight), target_weight + 1)
+    second_reachable = _bits_to_array(_reachable_sums(second_half, target_weight), target_weight + 1)
+    # Position i is set if i is reachable by the first half and target_weight - i by the second
+    first_weight = int(np.flatnonzero(first_reachable & second_reachable[::-1])[0])
+
+    return _find_subset(first_half, first_weight) + _find_subset(second_half, target_weight - first_weight)
+
+
+def _bits_to_array(bits, length):
+    """
+    Converts the bits of an integer into a boolean array
+
+    :param bits: The integer to convert
+    :param length: Number of bits to convert
+    :return: Boolean array where position i is whether bit i is set
+    """
+    packed = np.frombuffer(bits.to_bytes((length + 7) // 8, 'little'), dtype=np.uint8)
+    return np.unpackbits(packed, count=length, bitorder='little').astype(bool)
+
+
+# Worker processes may import this module, so the examples only run when it is executed directly
+if __name__ == '__main__':
+    whole_set = [25, 15, 10, 20, 5]
+    max_total_weight = 35
+    max_weight = subset_sum(whole_set, max_total_weight)
+    # Expected: 35
+    print(max_weight)
+
+    max_weight = bitset_subset_sum(whole_set, max_total_weight)
+    # Expected: 35
+    print(max_weight)
+
+    max_weight, subset = bitset_subset_sum(whole_set, max_total_weight, return_subset=True)
+    # Expected: 35 [10, 20, 5]
+    print(max_weight, subset)
+
+    max_weight = rolling_subset_sum(whole_set, max_total_weight)
+    # Expected: 35
+    print(max_weight)
+
+    max_weight = meet_in_the_middle_subset_sum(whole_set, max_total_weight)
+    # Expected: 35
+    print(max_weight)
+
+    large_set = [10 ** 12 + 7 * i ** 3 for i in range(40)]
+    max_weight = adaptive_subset_sum(large_set, 15 * 10 ** 12, workers=2)
+    # Expected: 14000003519425
+    print(max_weight)
+
+    index = get_subset_sum_index(whole_set, 60)
+    # Expected: [0, 5, 25, 35, 60]
+    best_weights, _ = index.best_weights([4, 9, 27, 36, 60])
+    print(best_weights)
+
+    index = SubsetSumIndex(whole_set, 60)
+    index.add_weights([1])
+    # Expected: 36
+    best_weight, _ = index.best_weight(36)
+    print(best_weight)
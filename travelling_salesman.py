@@ -1,4 +1,15 @@
 import itertools
+import math
+import numpy as np
+import random
+import time
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import shared_memory
+
+from minimum_spanning_tree import dense_prim
+
+# Arrays in shared memory which a Held-Karp worker process has attached to, set up by _attach_shared_arrays
+_worker_arrays = {}
 
 
 def dynamic_programming_tsp(city_map):
@@ -37,6 +48,132 @@ def dynamic_programming_tsp(city_map):
     return min_distance
 
 
+def held_karp_tsp(city_map, dtype=np.float64, chunk_size=1 << 16, workers=1):
+    """
+    Solves the Travelling Salesman Problem with the Held-Karp dynamic programming algorithm, indexing each subset of
+    cities by an integer bitmask. The table of optimum distances is a (2^n, n) NumPy array, filled one subset size at a
+    time with the minimum over previous cities vectorized.
+
+    With more than one worker, each subset size is split across a pool of processes. The table is kept in shared memory
+    so that it is never copied between processes, as the subsets of one size only depend on those one smaller.
+
+    :param city_map: Dictionary containing the minimum distances from each city to each other city
+    :param dtype: NumPy float type of the table. np.float32 halves the memory needed
+    :param chunk_size: Number of subsets processed at once, which bounds the size of temporary arrays
+    :param workers: Number of processes to fill the table with
+
+    :return: A tuple of the minimum distance to travel from the start city to all other cities and back again, and the
+             list of cities in the order visited on such a tour (beginning and ending with the start city)
+    """
+    cities, distances = _convert_city_map_to_matrix(city_map)
+    if len(cities) == 1:
+        return 0, [cities[0], cities[0]]
+
+    # City i + 1 is bit i of a subset, as the start city is never in a subset
+    others = len(cities) - 1
+    distances = distances.astype(dtype)
+    table_shape = (1 << others, others)
+
+    if workers == 1:
+        opt_distances = np.full(table_shape, np.inf, dtype=dtype)
+        opt_distances[1 << np.arange(others), np.arange(others)] = distances[0, 1:]
+        subset_sizes = _subset_sizes(others)
+        for k in range(2, others + 1):
+            _fill_layer(opt_distances, distances[1:, 1:], np.flatnonzero(subset_sizes == k), chunk_size)
+        return _find_optimum_tour(city_map, cities, distances, opt_distances)
+
+    table_memory = shared_memory.SharedMemory(create=True, size=int(np.prod(table_shape)) * np.dtype(dtype).itemsize)
+    try:
+        opt_distances = np.ndarray(table_shape, dtype=dtype, buffer=table_memory.buf)
+        opt_distances.fill(np.inf)
+        opt_distances[1 << np.arange(others), np.arange(others)] = distances[0, 1:]
+        _parallel_fill_table(opt_distances, table_memory.name, distances[1:, 1:], chunk_size, workers)
+        result = _find_optimum_tour(city_map, cities, distances, opt_distances)
+        del opt_distances  # the shared memory cannot be closed while an array still uses it
+    finally:
+        table_memory.close()
+        table_memory.unlink()
+
+    return result
+
+
+def anytime_tsp(city_map, time_budget=1.0, neighbour_count=10):
+    """
+    Heuristically solves the Travelling Salesman Problem for maps too large for the exact algorithms, yielding each
+    improved tour as soon as it is found. Tours are first built with nearest neighbour and Christofides, then improved
+    with 2-opt and Or-opt local search restricted to each city's nearest neighbours. Any time left afterwards is spent
+    perturbing the best tour with a double-bridge move and searching again.
+
+    Distances are assumed to be symmetric.
+
+    :param city_map: Dictionary containing the minimum distances from each city to each other city
+    :param time_budget: Number of seconds to search for before stopping
+    :param neighbour_count: Number of nearest cities considered when improving each city's edges
+
+    :return: A generator of tuples consisting of the following, where each tour is shorter than the one before:
+                - the distance of the tour
+                - the list of cities in the order visited (beginning and ending with the start city)
+                - a lower bound on the minimum distance, showing how far from optimal the tour could be
+    """
+    deadline = time.time() + time_budget
+    cities, distances = _convert_city_map_to_matrix(city_map)
+    if len(cities) <= 3:
+        tour = list(range(len(cities)))
+        # A single city is never left, and the diagonal of the distance matrix is infinite
+        length = _tour_length(distances, tour) if len(cities) > 1 else 0
+        yield length, [cities[city] for city in tour + [0]], length
+        return
+
+    lower_bound = _one_tree_bound(distances)
+    neighbours = _neighbour_lists(distances, neighbour_count)
+
+    best_tour = _nearest_neighbour_tour(distances)
+    best_length = _tour_length(distances, best_tour)
+    yield best_length, [cities[city] for city in best_tour + [0]], lower_bound
+
+    # Christofides sorts every pair of odd degree cities, so it is skipped once the budget has run out
+    if time.time() < deadline:
+        tour = _christofides_tour(distances)
+        length = _tour_length(distances, tour)
+        if length < best_length:
+            best_tour, best_length = tour, length
+            yield best_length, [cities[city] for city in best_tour + [0]], lower_bound
+
+    distance_lists = distances.tolist()
+    tour = best_tour
+    while time.time() < deadline:
+        improved = True
+        while improved and time.time() < deadline:
+            improved = _two_opt(distance_lists, tour, neighbours, deadline)
+            improved = _or_opt(distance_lists, tour, neighbours, deadline) or improved
+
+        length = _tour_length(distances, tour)
+        if length < best_length:
+            best_tour, best_length = tour[:], length
+            yield best_length, [cities[city] for city in best_tour + [0]], lower_bound
+
+        tour = _double_bridge(best_tour)
+
+
+def heuristic_tsp(city_map, time_budget=1.0, neighbour_count=10):
+    """
+    Heuristically solves the Travelling Salesman Problem, returning the best tour anytime_tsp finds within the time
+    budget
+
+    :param city_map: Dictionary containing the minimum distances from each city to each other city
+    :param time_budget: Number of seconds to search for before stopping
+    :param neighbour_count: Number of nearest cities considered when improving each city's edges
+
+    :return: A tuple of the distance of the best tour found, the list of cities in the order visited (beginning and
+             ending with the start city), and a lower bound on the minimum distance
+    """
+    result = None
+    for result in anytime_tsp(city_map, time_budget, neighbour_count):
+        pass
+
+    return result
+
+
 def _find_subsets(original_set, subset_length):
     """
     Generates all possible subsets of a certain size.
@@ -52,15 +189,468 @@ def _find_subsets(original_set, subset_length):
     return subsets
 
 
-graph = {
-    's': {'u': 1, 'x': 4, 'v': 2, 'y': 6, 'z': 5},
-    'u': {'s': 1, 'v': 3, 'x': 1, 'z': 3, 'y': 3},
-    'x': {'y': 2, 'z': 2, 'u': 1, 's': 4, 'v': 2},
-    'y': {'s': 6, 'u': 3, 'x': 2, 'v': 4, 'z': 4},
-    'v': {'x': 2, 'z': 3, 's': 2, 'u': 3, 'y': 4},
-    'z': {'s': 5, 'u': 3, 'x': 2, 'y': 4, 'v': 3}
-}
+def _convert_city_map_to_matrix(city_map):
+    """
+    Converts a dictionary of distances between cities into a distance matrix
+
+    :param city_map: Dictionary containing the minimum distances from each city to each other city
+
+    :return: A tuple of the list of cities, where a city's position is its row in the matrix, and a square NumPy array
+             where position [i, j] is the distance from city i to city j (np.inf if it is missing)
+    """
+    cities = list(city_map.keys())
+    city_positions = {city: i for i, city in enumerate(cities)}
+    distances = np.full((len(cities), len(cities)), np.inf)
+    for i, city in enumerate(cities):
+        row = city_map.get(city)
+        if row:
+            columns = list(map(city_positions.__getitem__, row))
+            distances[i, columns] = np.fromiter(row.values(), dtype=np.float64, count=len(row))
+
+    return cities, distances
+
+
+def _subset_sizes(set_length):
+    """
+    Calculates the number of elements in every subset of a set, with subsets represented as bitmasks
+
+    :param set_length: The number of elements in the whole set
+
+    :return: Array where position i is the number of bits set in i
+    """
+    subset_sizes = np.zeros(1, dtype=np.uint8)
+    for _ in range(set_length):
+        subset_sizes = np.concatenate((subset_sizes, subset_sizes + 1))
+
+    return subset_sizes
+
+
+def _fill_layer(opt_distances, between, subsets, chunk_size):
+    """
+    Fills in the optimum distances of a set of subsets which are all the same size, using the optimum distances of
+    subsets one smaller
+
+    :param opt_distances: Table where position [subset, city] is the minimum distance from the start city through every
+                          city in the subset, ending at the given city (inf if the city is not in the subset)
+    :param between: Distance matrix between every city other than the start city
+    :param subsets: Array of bitmasks of the subsets to fill in
+    :param chunk_size: Number of subsets processed at once
+    """
+    for chunk_start in range(0, len(subsets), chunk_size):
+        chunk = subsets[chunk_start:chunk_start + chunk_size]
+        for city in range(len(between)):
+            city_bit = 1 << city
+            ending_subsets = chunk[(chunk & city_bit) != 0]
+            # Cities missing from the previous subset are inf in the table, so never give the minimum
+            opt_distances[ending_subsets, city] = np.min(opt_distances[ending_subsets ^ city_bit] + between[:, city],
+                                                         axis=1)
+
+
+def _find_optimum_tour(city_map, cities, distances, opt_distances):
+    """
+    Finds the optimum tour from a filled Held-Karp table by walking back through it, recomputing which previous city
+    gave each optimum
+
+    :param city_map: Dictionary containing the minimum distances from each city to each other city
+    :param cities: List of cities, where a city's position is its row in the distance matrix
+    :param distances: Distance matrix between every city
+    :param opt_distances: Filled table of optimum distances, as built by held_karp_tsp
+
+    :return: A tuple of the minimum distance of a tour, and the list of cities in the order visited on that tour
+    """
+    between = distances[1:, 1:]
+    full_subset = len(opt_distances) - 1
+    final_distances = opt_distances[full_subset] + distances[1:, 0]
+    last_city = int(np.argmin(final_distances))
+    min_distance = final_distances[last_city].item()
+
+    tour = [last_city]
+    subset = full_subset
+    while subset != 1 << tour[-1]:
+        subset ^= 1 << tour[-1]
+        tour.append(int(np.argmin(opt_distances[subset] + between[:, tour[-1]])))
+    tour = [cities[0]] + [cities[city + 1] for city in reversed(tour)] + [cities[0]]
+
+    if all(isinstance(distance, int) for distances_from in city_map.values() for distance in distances_from.values()):
+        min_distance = int(round(min_distance))
+    return min_distance, tour
+
+
+def _parallel_fill_table(opt_distances, table_name, between, chunk_size, workers):
+    """
+    Fills in a Held-Karp table one subset size at a time, splitting each size across a pool of processes. Sizes with
+    no more than chunk_size subsets are filled in directly, as they are not worth sending to the pool.
+
+    :param opt_distances: Table in shared memory with the single city subsets already filled in
+    :param table_name: Name of the shared memory block holding the table
+    :param between: Distance matrix between every city other than the start city
+    :param chunk_size: Number of subsets processed at once
+    :param workers: Number of processes to fill the table with
+    """
+    subset_sizes = _subset_sizes(len(between))
+    ordered_subsets = np.argsort(subset_sizes, kind='stable')
+    size_starts = np.concatenate(([0], np.cumsum(np.bincount(subset_sizes)))).tolist()
+
+    subsets_memory = shared_memory.SharedMemory(create=True, size=ordered_subsets.nbytes)
+    try:
+        np.ndarray(ordered_subsets.shape, dtype=ordered_subsets.dtype, buffer=subsets_memory.buf)[:] = ordered_subsets
+
+        initargs = (table_name, opt_distances.shape, opt_distances.dtype.str, subsets_memory.name,
+                    len(ordered_subsets), between)
+        with ProcessPoolExecutor(workers, initializer=_attach_shared_arrays, initargs=initargs) as executor:
+            for k in range(2, len(between) + 1):
+                start, stop = size_starts[k], size_starts[k + 1]
+                if stop - start <= chunk_size:
+                    _fill_layer(opt_distances, between, ordered_subsets[start:stop], chunk_size)
+                else:
+                    shard_bounds = np.linspace(start, stop, workers + 1).astype(np.int64).tolist()
+                    list(executor.map(_fill_layer_shard, shard_bounds[:-1], shard_bounds[1:],
+                                      [chunk_size] * workers))
+    finally:
+        subsets_memory.close()
+        subsets_memory.unlink()
+
+
+def _attach_shared_arrays(table_name, table_shape, table_dtype, subsets_name, subset_count, between):
+    """
+    Attaches a Held-Karp worker process to the table and list of subsets in shared memory
+
+    :param table_name: Name of the shared memory block holding the table
+    :param table_shape: Shape of the table
+    :param table_dtype: NumPy type string of the table
+    :param subsets_name: Name of the shared memory block holding every subset, ordered by size
+    :param subset_count: Number of subsets
+    :param between: Distance matrix between every city other than the start city
+    """
+    table_memory = shared_memory.SharedMemory(name=table_name)
+    subsets_memory = shared_memory.SharedMemory(name=subsets_name)
+    _worker_arrays.update({
+        'memory': (table_memory, subsets_memory),
+        'opt_distances': np.ndarray(table_shape, dtype=table_dtype, buffer=table_memory.buf),
+        'ordered_subsets': np.ndarray(subset_count, dtype=np.int64, buffer=subsets_memory.buf),
+        'between': between
+    })
+
+
+def _fill_layer_shard(start, stop, chunk_size):
+    """
+    Fills in part of one subset size of the shared Held-Karp table, from within a worker process
+
+    :param start: Position of the first subset to fill in, within the subsets ordered by size
+    :param stop: Position after the last subset to fill in
+    :param chunk_size: Number of subsets processed at once
+    """
+    _fill_layer(_worker_arrays.get('opt_distances'), _worker_arrays.get('between'),
+                _worker_arrays.get('ordered_subsets')[start:stop], chunk_size)
+
+
+def _tour_length(distances, tour):
+    """
+    Calculates the distance of a tour, including the return to the first city
+
+    :param distances: Distance matrix between every city
+    :param tour: List of city positions in the order visited, without the return to the first city
+
+    :return: The distance of the tour
+    """
+    tour = np.asarray(tour)
+    return distances[tour, np.roll(tour, -1)].sum().item()
+
+
+def _one_tree_bound(distances):
+    """
+    Calculates a lower bound on the minimum tour distance from a 1-tree: a minimum spanning tree of every city except
+    the first, plus the two shortest edges from the first city. Every tour is itself a 1-tree, so can be no shorter.
+
+    :param distances: Distance matrix between every city
+
+    :return: The distance of the minimum 1-tree
+    """
+    symmetric = np.minimum(distances, distances.T)
+    spanning_tree = dense_prim(symmetric[1:, 1:])
+    return sum(edge[2] for edge in spanning_tree) + np.sort(symmetric[0, 1:])[:2].sum().item()
+
+
+def _neighbour_lists(distances, neighbour_count):
+    """
+    Finds the nearest cities to each city
+
+    :param distances: Distance matrix between every city
+    :param neighbour_count: Number of nearest cities to find
+
+    :return: List where position i is the list of the nearest cities to city i, in increasing order of distance
+    """
+    neighbour_count = min(neighbour_count, len(distances) - 1)
+    without_self = distances.copy()
+    np.fill_diagonal(without_self, np.inf)
+    nearest = np.argpartition(without_self, neighbour_count - 1, axis=1)[:, :neighbour_count]
+    nearest_distances = np.take_along_axis(without_self, nearest, axis=1)
+
+    return np.take_along_axis(nearest, np.argsort(nearest_distances, axis=1), axis=1).tolist()
+
+
+def _nearest_neighbour_tour(distances):
+    """
+    Builds a tour by starting at the first city and always travelling to the nearest unvisited city
+
+    :param distances: Distance matrix between every city
+
+    :return: List of city positions in the order visited, without the return to the first city
+    """
+    unvisited = np.ones(len(distances), dtype=bool)
+    unvisited[0] = False
+    tour = [0]
+    for _ in range(len(distances) - 1):
+        remaining_distances = np.where(unvisited, distances[tour[-1]], np.inf)
+        next_city = int(np.argmin(remaining_distances))
+        unvisited[next_city] = False
+        tour.append(next_city)
+
+    return tour
+
+
+def _christofides_tour(distances):
+    """
+    Builds a tour with the Christofides algorithm: a minimum spanning tree is joined with a matching of its odd degree
+    vertices, and an Euler tour of the result is shortcut past repeated cities. The matching is built greedily rather
+    than being a minimum weight perfect matching, so the 1.5 approximation guarantee does not hold, although the tour is
+    usually close.
+
+    :param distances: Distance matrix between every city
+
+    :return: List of city positions in the order visited, without the return to the first city
+    """
+    symmetric = np.minimum(distances, distances.T)
+    multigraph = [[] for _ in range(len(distances))]
+    for first_city, second_city, _ in dense_prim(symmetric):
+        multigraph[first_city].append(second_city)
+        multigraph[second_city].append(first_city)
+
+    odd_cities = np.array([city for city in range(len(distances)) if len(multigraph[city]) % 2 == 1], dtype=np.int64)
+    first_positions, second_positions = np.triu_indices(len(odd_cities), 1)
+    order = np.argsort(symmetric[odd_cities[first_positions], odd_cities[second_positions]], kind='stable')
+    matched = set()
+    for first_city, second_city in zip(odd_cities[first_positions[order]].tolist(),
+                                       odd_cities[second_positions[order]].tolist()):
+        if len(matched) == len(odd_cities):
+            break
+        if first_city not in matched and second_city not in matched:
+            matched.update((first_city, second_city))
+            multigraph[first_city].append(second_city)
+            multigraph[second_city].append(first_city)
+
+    # Hierholzer's algorithm, removing each edge from both ends as it is used
+    tour = []
+    visited = [False] * len(distances)
+    stack = [0]
+    while stack:
+        city = stack[-1]
+        if multigraph[city]:
+            next_city = multigraph[city].pop()
+            multigraph[next_city].remove(city)
+            stack.append(next_city)
+        else:
+            stack.pop()
+            if not visited[city]:
+                visited[city] = True
+                tour.append(city)
+
+    # The circuit is built backwards, so reverse it, then rotate it to begin at the first city as the local search
+    # steps never move that city
+    tour.reverse()
+    start = tour.index(0)
+    return tour[start:] + tour[:start]
+
+
+def _two_opt(distances, tour, neighbours, deadline):
+    """
+    Improves a tour in place by replacing pairs of edges (a, b) and (c, d) with (a, c) and (b, d) whenever that is
+    shorter, reversing the path between them. Only cities c which are nearer to a than b is are tried. The first city
+    is never moved.
+
+    :param distances: Distance matrix between every city, as nested lists for fast element access
+    :param tour: List of city positions in the order visited, without the return to the first city
+    :param neighbours: List of the nearest cities to each city
+    :param deadline: Time at which to stop searching
+
+    :return: Whether the tour was improved
+    """
+    city_count = len(tour)
+    positions = [0] * city_count
+    for position, city in enumerate(tour):
+        positions[city] = position
+
+    improved = False
+    improving = True
+    while improving and time.time() < deadline:
+        improving = False
+        for i in range(city_count):
+            a = tour[i]
+            b = tour[(i + 1) % city_count]
+            for c in neighbours[a]:
+                gain = distances[a][b] - distances[a][c]
+                if gain <= 0:
+                    break
+
+                j = positions[c]
+                d = tour[(j + 1) % city_count]
+                if c == b or d == a or gain + distances[c][d] - distances[b][d] <= 1e-10:
+                    continue
+
+                start, end = (i + 1, j) if i < j else (j + 1, i)
+                tour[start:end + 1] = tour[start:end + 1][::-1]
+                for position in range(start, end + 1):
+                    positions[tour[position]] = position
+                improving = improved = True
+                break
+
+    return improved
+
+
+def _or_opt(distances, tour, neighbours, deadline):
+    """
+    Improves a tour in place by moving paths of up to three cities, possibly reversed, to between a nearby city and its
+    successor whenever that is shorter. The first city is never moved.
+
+    :param distances: Distance matrix between every city, as nested lists for fast element access
+    :param tour: List of city positions in the order visited, without the return to the first city
+    :param neighbours: List of the nearest cities to each city
+    :param deadline: Time at which to stop searching
+
+    :return: Whether the tour was improved
+    """
+    city_count = len(tour)
+    positions = [0] * city_count
+    for position, city in enumerate(tour):
+        positions[city] = position
+
+    improved = False
+    for segment_length in range(1, 4):
+        i = 1
+        while i + segment_length <= city_count and time.time() < deadline:
+            segment = tour[i:i + segment_length]
+            previous_city = tour[i - 1]
+            next_city = tour[(i + segment_length) % city_count]
+            removal_gain = distances[previous_city][segment[0]] + distances[segment[-1]][next_city] - \
+                distances[previous_city][next_city]
+
+            best_move = None
+            for c in set(neighbours[segment[0]] + neighbours[segment[-1]]):
+                if c in segment or c == previous_city:
+                    continue
+                d = tour[(positions[c] + 1) % city_count]
+                forward_cost = distances[c][segment[0]] + distances[segment[-1]][d] - distances[c][d]
+                reverse_cost = distances[c][segment[-1]] + distances[segment[0]][d] - distances[c][d]
+                for cost, oriented_segment in ((forward_cost, segment), (reverse_cost, segment[::-1])):
+                    if cost < removal_gain - 1e-10 and (best_move is None or cost < best_move[0]):
+                        best_move = (cost, c, oriented_segment)
+
+            if best_move is None:
+                i += 1
+            else:
+                _, c, oriented_segment = best_move
+                rest = tour[:i] + tour[i + segment_length:]
+                k = rest.index(c)
+                tour[:] = rest[:k + 1] + oriented_segment + rest[k + 1:]
+                for position, city in enumerate(tour):
+                    positions[city] = position
+                improved = True
+
+    return improved
+
+
+def _double_bridge(tour):
+    """
+    Perturbs a tour by cutting it into four paths A B C D and reconnecting them as A C B D, a change which 2-opt and
+    Or-opt cannot easily undo
+
+    :param tour: List of city positions in the order visited, without the return to the first city
+
+    :return: The perturbed tour, with the first city still first
+    """
+    first_cut, second_cut, third_cut = sorted(random.sample(range(1, len(tour)), 3))
+    return tour[:first_cut] + tour[second_cut:third_cut] + tour[first_cut:second_cut] + tour[third_cut:]
+
+
+def _random_city_map(city_count):
+    """
+    Generates a random map of cities placed on a plane, used for benchmarking and checking heuristics
+
+    :param city_count: Number of cities in the map
+
+    :return: Dictionary containing the straight line distances from each city to each other city
+    """
+    points = [(random.random(), random.random()) for _ in range(city_count)]
+    return {city: {other_city: math.dist(points[city], points[other_city])
+                   for other_city in range(city_count) if other_city != city}
+            for city in range(city_count)}
+
+
+def _check_heuristics(city_count, trials):
+    """
+    Checks every tour anytime_tsp yields against the exact dynamic_programming_tsp on small random maps. Each tour must
+    visit every city once, beginning and ending with the first, and can be no shorter than the optimum, which can be no
+    shorter than the lower bound.
+
+    :param city_count: Number of cities in each map
+    :param trials: Number of maps to check
+    """
+    optimal_count = 0
+    for _ in range(trials):
+        city_map = _random_city_map(city_count)
+        min_distance = dynamic_programming_tsp(city_map)
+        for heuristic_distance, tour, lower_bound in anytime_tsp(city_map, time_budget=0.1):
+            assert len(tour) == city_count + 1 and tour[0] == tour[-1] == 0
+            assert sorted(tour[:-1]) == sorted(city_map.keys())
+            assert lower_bound - 1e-9 <= min_distance <= heuristic_distance + 1e-9
+        optimal_count += math.isclose(min_distance, heuristic_distance)
+
+    print('Optimal tours found:', optimal_count, 'of', trials)
+
+
+def _benchmark_held_karp(city_count, worker_counts):
+    """
+    Times held_karp_tsp on a random city map with different numbers of workers
+
+    :param city_count: Number of cities in the map
+    :param worker_counts: List of numbers of workers to time
+    """
+    cities = list(range(city_count))
+    city_map = {city: {other_city: random.randint(1, 100) for other_city in cities if other_city != city}
+                for city in cities}
+
+    for workers in worker_counts:
+        s = time.time()
+        min_distance, _ = held_karp_tsp(city_map, workers=workers)
+        print('Workers:', workers, 'distance:', min_distance, 'time:', time.time() - s, 'seconds')
+
+
+# Worker processes may import this module, so the examples only run when it is executed directly
+if __name__ == '__main__':
+    graph = {
+        's': {'u': 1, 'x': 4, 'v': 2, 'y': 6, 'z': 5},
+        'u': {'s': 1, 'v': 3, 'x': 1, 'z': 3, 'y': 3},
+        'x': {'y': 2, 'z': 2, 'u': 1, 's': 4, 'v': 2},
+        'y': {'s': 6, 'u': 3, 'x': 2, 'v': 4, 'z': 4},
+        'v': {'x': 2, 'z': 3, 's': 2, 'u': 3, 'y': 4},
+        'z': {'s': 5, 'u': 3, 'x': 2, 'y': 4, 'v': 3}
+    }
+
+    min_distance = dynamic_programming_tsp(graph)
+    # Expected: 13
+    print(min_distance)
+
+    min_distance, tour = held_karp_tsp(graph)
+    # Expected: 13 ['s', 'v', 'z', 'y', 'x', 'u', 's']
+    print(min_distance, tour)
+
+    min_distance, tour = held_karp_tsp(graph, workers=2)
+    # Expected: 13 ['s', 'v', 'z', 'y', 'x', 'u', 's']
+    print(min_distance, tour)
+
+    _benchmark_held_karp(18, [1, 2, 4])
+
+    for distance, tour, lower_bound in anytime_tsp(_random_city_map(1000), time_budget=2):
+        print('Distance:', distance, 'gap to lower bound:', distance / lower_bound - 1)
 
-min_distance = dynamic_programming_tsp(graph)
-# Expected: 13
-print(min_distance)
+    _check_heuristics(8, 5)